@@ -0,0 +1,379 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import ffmpeg
+import numpy as np
+
+from parameters import validate
+from python_osc import OscClient
+
+SAMPLE_RATE = 44100
+FFT_SIZE = 2048
+HOP_SIZE = 512
+FRAME_RATE = 30  # Same as frameRate in VideoEffects.pde
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".video_effects", "audio_analysis"
+)
+
+# Frequency bands in Hz
+BANDS = {
+    "sub": (20, 60),
+    "bass": (60, 250),
+    "lowmid": (250, 1000),
+    "mid": (1000, 4000),
+    "high": (4000, 16000),
+}
+
+# Column layout of an analysis row
+LEVELS = ("rms",) + tuple(BANDS)
+FEATURES = LEVELS + tuple(f"{name}_env" for name in LEVELS) + ("flux", "onset")
+
+# Levels are mapped from this dB range to 0-1
+DB_FLOOR = -60.0
+
+DEFAULT_MAPPING = [
+    {"param": "/size", "feature": "bass_env", "min": 0.6, "max": 2.4},
+    {"param": "/rotation", "feature": "mid_env", "min": 0.2, "max": 2.0},
+    {"param": "/zoom", "feature": "rms_env", "min": -200, "max": 300},
+    {"param": "/noise", "feature": "high_env", "min": 0.0, "max": 0.6},
+    {"param": "/rgbshift", "feature": "onset", "min": 0.0, "max": 1.0},
+]
+
+
+class StreamingAnalyser:
+    """
+    Streaming FFT analysis over overlapping blocks.
+
+    Samples are written into a preallocated ring buffer; every HOP_SIZE new
+    samples the last FFT_SIZE of them are windowed and analysed into one row of
+    FEATURES. The ring and working buffers are allocated once up front; only
+    the FFT itself returns a fresh array.
+    """
+
+    def __init__(
+        self,
+        sample_rate=SAMPLE_RATE,
+        fft_size=FFT_SIZE,
+        hop_size=HOP_SIZE,
+        attack_ms=10.0,
+        release_ms=250.0,
+        onset_sensitivity=1.5,
+    ):
+        self.sample_rate = sample_rate
+        self.fft_size = fft_size
+        self.hop_size = hop_size
+        self.attack_ms = attack_ms
+        self.release_ms = release_ms
+        self.onset_sensitivity = onset_sensitivity
+
+        self.ring = np.zeros(fft_size, dtype=np.float32)
+        self.write_pos = 0
+        self.pending = 0  # Samples since the last analysed hop
+
+        self.window = np.hanning(fft_size).astype(np.float32)
+        self.frame = np.empty(fft_size, dtype=np.float32)
+        self.magnitude = np.empty(fft_size // 2 + 1, dtype=np.float32)
+        self.power = np.empty_like(self.magnitude)
+        self.coeff = np.empty(len(LEVELS), dtype=np.float32)
+        self.previous = np.zeros_like(self.magnitude)
+        self.flux_diff = np.empty_like(self.magnitude)
+        self.levels = np.zeros(len(LEVELS), dtype=np.float32)
+        self.envelopes = np.zeros(len(LEVELS), dtype=np.float32)
+        self.flux_history = np.zeros(43, dtype=np.float32)  # ~0.5s of hops
+        self.flux_index = 0
+
+        # Bins for each band as reduceat start indices. Edges are clipped below
+        # Nyquist, as reduceat needs them in range; a band left empty by that
+        # (only at low sample rates) would get one bin, so it is scaled to 0
+        freqs = np.fft.rfftfreq(fft_size, 1.0 / sample_rate)
+        edges = np.searchsorted(freqs, np.ravel(list(BANDS.values())))
+        self.band_edges = np.minimum(edges, len(freqs) - 1).astype(np.intp)
+        self.band_power = np.empty(len(self.band_edges), dtype=np.float32)
+        band_empty = self.band_edges[::2] >= self.band_edges[1::2]
+
+        # One-pole follower coefficients per hop
+        hop_ms = 1000.0 * hop_size / sample_rate
+        self.attack = np.float32(np.exp(-hop_ms / attack_ms))
+        self.release = np.float32(np.exp(-hop_ms / release_ms))
+
+        # Window energy normalisation so a full-scale sine sits near 0 dB
+        self.power_scale = np.float32(4.0 / (self.window.sum() ** 2))
+        self.band_scale = np.where(band_empty, 0.0, self.power_scale).astype(np.float32)
+
+    def push(self, samples, out):
+        """
+        Feed mono float samples and write one row per completed hop.
+
+        Args:
+            samples (array): New float32 samples
+            out (array): (n, len(FEATURES)) buffer to write rows into; must
+                have room for len(samples) // hop_size + 1 rows
+
+        Returns:
+            int: Number of rows written
+        """
+        rows = 0
+        offset = 0
+        while offset < len(samples):
+            take = min(self.hop_size - self.pending, len(samples) - offset)
+            self._write_ring(samples[offset : offset + take])
+            offset += take
+            self.pending += take
+            if self.pending == self.hop_size:
+                self.pending = 0
+                self._analyse(out[rows])
+                rows += 1
+        return rows
+
+    def _write_ring(self, samples):
+        n = len(samples)
+        end = self.write_pos + n
+        if end <= self.fft_size:
+            self.ring[self.write_pos : end] = samples
+        else:
+            split = self.fft_size - self.write_pos
+            self.ring[self.write_pos :] = samples[:split]
+            self.ring[: n - split] = samples[split:]
+        self.write_pos = end % self.fft_size
+
+    def _analyse(self, row):
+        # Unroll the ring oldest-first into the frame buffer and window it
+        split = self.fft_size - self.write_pos
+        self.frame[:split] = self.ring[self.write_pos :]
+        self.frame[split:] = self.ring[: self.write_pos]
+        np.multiply(self.frame, self.window, out=self.frame)
+
+        np.abs(np.fft.rfft(self.frame), out=self.magnitude)
+
+        # Levels in dB, mapped to 0-1
+        np.multiply(self.magnitude, self.magnitude, out=self.power)
+        self.levels[0] = self.power.sum() * self.power_scale
+        np.add.reduceat(self.power, self.band_edges, out=self.band_power)
+        self.levels[1:] = self.band_power[::2] * self.band_scale
+        np.maximum(self.levels, 1e-12, out=self.levels)
+        np.log10(self.levels, out=self.levels)
+        self.levels *= 10.0 / -DB_FLOOR
+        self.levels += 1.0
+        np.clip(self.levels, 0.0, 1.0, out=self.levels)
+
+        # Envelope followers: fast attack, slow release
+        coeff = self.coeff
+        coeff.fill(self.release)
+        coeff[self.levels > self.envelopes] = self.attack
+        # env = coeff * env + (1 - coeff) * level == level + coeff * (env - level)
+        self.envelopes -= self.levels
+        self.envelopes *= coeff
+        self.envelopes += self.levels
+
+        # Spectral flux and an adaptive onset threshold
+        np.subtract(self.magnitude, self.previous, out=self.flux_diff)
+        np.maximum(self.flux_diff, 0.0, out=self.flux_diff)
+        flux = float(self.flux_diff.sum()) / self.fft_size
+        self.previous[:] = self.magnitude
+        threshold = self.flux_history.mean() * self.onset_sensitivity
+        self.flux_history[self.flux_index] = flux
+        self.flux_index = (self.flux_index + 1) % len(self.flux_history)
+        onset = min(1.0, (flux - threshold) / threshold) if flux > threshold > 0 else 0
+
+        n = len(LEVELS)
+        row[:n] = self.levels
+        row[n : 2 * n] = self.envelopes
+        row[2 * n] = flux
+        row[2 * n + 1] = onset
+
+
+def decode_audio(path, sample_rate=SAMPLE_RATE, chunk_samples=SAMPLE_RATE):
+    """
+    Decode any audio or video file to mono float32 chunks through ffmpeg.
+
+    Yields:
+        array: float32 samples
+    """
+    process = (
+        ffmpeg.input(path)
+        .output("pipe:", format="f32le", ac=1, ar=sample_rate)
+        .global_args("-loglevel", "error")
+        .run_async(pipe_stdout=True)
+    )
+    try:
+        while True:
+            data = process.stdout.read(chunk_samples * 4)
+            if not data:
+                break
+            yield np.frombuffer(data[: len(data) // 4 * 4], dtype="<f4")
+    finally:
+        process.stdout.close()
+        process.wait()
+
+
+def read_stdin(chunk_samples=HOP_SIZE):
+    """Read raw signed 16-bit mono samples from stdin as float32 chunks."""
+    stream = sys.stdin.buffer
+    while True:
+        data = stream.read(chunk_samples * 2)
+        if not data:
+            break
+        yield np.frombuffer(data[: len(data) // 2 * 2], dtype="<i2") / np.float32(32768)
+
+
+def cache_path(path, cache_dir, analyser):
+    """
+    Cache file for an audio file's analysis.
+
+    Changes when the file does or when any analyser setting that affects the
+    output does, including the follower and onset settings behind the *_env
+    and onset columns.
+    """
+    stat = os.stat(path)
+    raw = (
+        f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|"
+        f"{analyser.sample_rate}|{analyser.fft_size}|{analyser.hop_size}|"
+        f"{analyser.attack_ms}|{analyser.release_ms}|{analyser.onset_sensitivity}"
+    )
+    return os.path.join(
+        cache_dir, hashlib.sha1(raw.encode("utf8")).hexdigest() + ".npz"
+    )
+
+
+def analyse_file(path, analyser=None, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Analyse a whole file, or load the analysis from the disk cache.
+
+    Returns:
+        array: (hops, len(FEATURES)) float32 analysis
+    """
+    analyser = analyser or StreamingAnalyser()
+    cached = cache_path(path, cache_dir, analyser)
+    if os.path.exists(cached):
+        with np.load(cached) as data:
+            if tuple(data["features"]) == FEATURES:
+                return data["analysis"]
+
+    chunks = []
+    block = np.empty((SAMPLE_RATE // analyser.hop_size + 1, len(FEATURES)), np.float32)
+    for samples in decode_audio(path, analyser.sample_rate):
+        for start in range(0, len(samples), SAMPLE_RATE):
+            rows = analyser.push(samples[start : start + SAMPLE_RATE], block)
+            chunks.append(block[:rows].copy())
+    analysis = np.concatenate(chunks) if chunks else np.empty((0, len(FEATURES)))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    np.savez(cached, analysis=analysis, features=np.array(FEATURES))
+    return analysis
+
+
+class ParameterMapper:
+    """
+    Turns analysis rows into OSC parameter values.
+
+    Each mapping entry takes one feature in 0-1 and scales it into
+    [min, max] of the target parameter, with an optional 'curve' exponent.
+    """
+
+    def __init__(self, mapping=DEFAULT_MAPPING):
+        self.entries = []
+        for entry in mapping:
+            if entry["feature"] not in FEATURES:
+                raise ValueError(f"Unknown feature: {entry['feature']}")
+            validate(entry["param"], entry["min"])  # Rejects unknown parameters
+            self.entries.append(
+                (
+                    entry["param"],
+                    FEATURES.index(entry["feature"]),
+                    float(entry["min"]),
+                    float(entry["max"]),
+                    float(entry.get("curve", 1.0)),
+                )
+            )
+
+    def values(self, row):
+        """Yield (address, value) for one analysis row."""
+        for param, index, low, high, curve in self.entries:
+            amount = min(max(float(row[index]), 0.0), 1.0) ** curve
+            yield param, validate(param, low + (high - low) * amount)
+
+
+def load_mapping(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def send_row(osc, mapper, row):
+    for address, value in mapper.values(row):
+        osc.send_message(address, value)
+
+
+def play_analysis(analysis, mapper, osc, hop_seconds, frame_rate=FRAME_RATE):
+    """Send a cached analysis in realtime, one message set per render frame."""
+    start = time.perf_counter()
+    duration = len(analysis) * hop_seconds
+    frame = 0
+    while frame / frame_rate < duration:
+        target = start + frame / frame_rate
+        delay = target - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        index = min(int(frame / frame_rate / hop_seconds), len(analysis) - 1)
+        send_row(osc, mapper, analysis[index])
+        frame += 1
+
+
+def drive_live(chunks, analyser, mapper, osc, frame_rate=FRAME_RATE):
+    """
+    Analyse a live stream and send parameters at the render frame rate.
+
+    The audio clock paces the output: the latest row is sent each time the
+    stream passes a frame boundary.
+    """
+    block = np.empty((64, len(FEATURES)), np.float32)
+    samples_per_frame = analyser.sample_rate / frame_rate
+    samples_seen = 0
+    next_frame = samples_per_frame
+    for chunk in chunks:
+        for start in range(0, len(chunk), 63 * analyser.hop_size):
+            part = chunk[start : start + 63 * analyser.hop_size]
+            rows = analyser.push(part, block)
+            samples_seen += len(part)
+            if rows and samples_seen >= next_frame:
+                send_row(osc, mapper, block[rows - 1])
+                while next_frame <= samples_seen:
+                    next_frame += samples_per_frame
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Drive controller parameters from audio"
+    )
+    parser.add_argument("audio", help="Audio/video file, or '-' for s16le mono stdin")
+    parser.add_argument("--mapping", help="JSON file with the feature mapping table")
+    parser.add_argument("--sample-rate", type=int, default=SAMPLE_RATE)
+    parser.add_argument("--fps", type=int, default=FRAME_RATE)
+    parser.add_argument("--port", type=int, default=12000)
+    parser.add_argument("--analyse-only", action="store_true")
+    args = parser.parse_args()
+
+    mapper = ParameterMapper(
+        load_mapping(args.mapping) if args.mapping else DEFAULT_MAPPING
+    )
+    osc = OscClient(port=args.port)
+    analyser = StreamingAnalyser(sample_rate=args.sample_rate)
+
+    if args.audio == "-":
+        print("Reading s16le mono audio from stdin...")
+        drive_live(read_stdin(), analyser, mapper, osc, args.fps)
+    else:
+        start = time.perf_counter()
+        analysis = analyse_file(args.audio, analyser)
+        hop_seconds = analyser.hop_size / analyser.sample_rate
+        print(
+            f"Analysis ready: {len(analysis)} hops "
+            f"({len(analysis) * hop_seconds:.1f}s of audio) "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        if not args.analyse_only:
+            play_analysis(analysis, mapper, osc, hop_seconds, args.fps)
@@ -0,0 +1,501 @@
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import ffmpeg
+import numpy as np
+
+from parameters import RENDER_HEIGHT, RENDER_WIDTH
+
+DEFAULT_SLOTS = 16
+DEFAULT_MAX_READERS = 16
+POLL_INTERVAL = 0.0005  # Seconds between checks while waiting on the ring
+LIVENESS_INTERVAL = 0.1  # Seconds between reader liveness checks while blocked
+READER_TIMEOUT = 10.0  # Seconds a reader may hold the writer up without a heartbeat
+
+# Header words (int64) at the start of the shared block
+HEADER_WORDS = 8
+H_WRITE_SEQ, H_CLOSED, H_WIDTH, H_HEIGHT, H_SLOTS, H_MAX_READERS = range(6)
+
+# Reader cursor value for a free reader slot
+FREE = -1
+
+
+class ReaderReleased(RuntimeError):
+    """The reader's slot was freed, or its frame overwritten, by the writer."""
+
+
+def _attach_untracked(name):
+    """
+    Open an existing block without registering it with the resource tracker.
+
+    Before Python 3.13 attaching registers the block too, so the tracker
+    unlinks it when a worker exits; only the creator should do that.
+    Unregistering afterwards isn't safe either, as forked workers share the
+    creator's tracker.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class FrameRing:
+    """
+    Fixed-size frame slots in one shared memory block.
+
+    Layout, all int64 until the frames:
+        header[HEADER_WORDS]   write sequence, closed flag and geometry
+        cursors[max_readers]   next sequence each reader will read, or FREE
+        tokens[max_readers]    registration each reader slot belongs to
+        pids[max_readers]      process id of each attached reader, 0 until then
+        beats[max_readers]     heartbeat counter each reader bumps as it reads
+        slot_seq[slots]        sequence number held by each slot
+        frames[slots]          height x width x 3 uint8 frames
+
+    Frame n lives in slot n % slots. The writer publishes a frame by filling
+    the slot, setting slot_seq and then bumping the write sequence, so a
+    reader that sees write_seq > n can read frame n without a lock, and checks
+    slot_seq to be sure the slot wasn't reused under it.
+    """
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        words = np.ndarray((HEADER_WORDS,), np.int64, shm.buf)
+        self.width = int(words[H_WIDTH])
+        self.height = int(words[H_HEIGHT])
+        self.slots = int(words[H_SLOTS])
+        self.max_readers = int(words[H_MAX_READERS])
+
+        offset = 0
+        self.header, offset = self._array(offset, HEADER_WORDS)
+        self.cursors, offset = self._array(offset, self.max_readers)
+        self.tokens, offset = self._array(offset, self.max_readers)
+        self.pids, offset = self._array(offset, self.max_readers)
+        self.beats, offset = self._array(offset, self.max_readers)
+        self.slot_seq, offset = self._array(offset, self.slots)
+        self.frames = np.ndarray(
+            (self.slots, self.height, self.width, 3), np.uint8, shm.buf, offset
+        )
+
+    def _array(self, offset, count):
+        array = np.ndarray((count,), np.int64, self.shm.buf, offset)
+        return array, offset + array.nbytes
+
+    @staticmethod
+    def nbytes(width, height, slots, max_readers):
+        words = HEADER_WORDS + 4 * max_readers + slots
+        return words * 8 + slots * width * height * 3
+
+    @classmethod
+    def create(
+        cls, width, height, slots=DEFAULT_SLOTS, max_readers=DEFAULT_MAX_READERS
+    ):
+        size = cls.nbytes(width, height, slots, max_readers)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        words = np.ndarray((HEADER_WORDS + 4 * max_readers + slots,), np.int64, shm.buf)
+        words[:] = 0
+        words[H_WIDTH] = width
+        words[H_HEIGHT] = height
+        words[H_SLOTS] = slots
+        words[H_MAX_READERS] = max_readers
+        ring = cls(shm, owner=True)
+        ring.cursors[:] = FREE
+        ring.slot_seq[:] = FREE
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        return cls(_attach_untracked(name), owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        # Drop our views before closing, or the buffer export stays alive
+        self.header = self.cursors = self.tokens = self.pids = self.beats = None
+        self.slot_seq = self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class FrameService:
+    """
+    Decodes one video into a FrameRing that many processes can read.
+
+    The writer waits for the slowest registered reader before reusing a slot,
+    so every reader sees every frame from the point it joined. While it
+    waits it frees readers whose heartbeat hasn't moved for READER_TIMEOUT
+    (a crashed worker, or one that never attached), so they can't stall the
+    decode. Heartbeats are counters the writer times with its own clock, so
+    this works the same on every platform. Readers are
+    registered with add_reader() and handed to workers as picklable
+    ReaderHandles; registration happens here because claiming a cursor from
+    another process would need a cross-process lock.
+
+    Args:
+        frames (iterable): (height, width, 3) uint8 frames, e.g. decode_frames()
+        width (int): Frame width
+        height (int): Frame height
+        slots (int): Frames held in the ring
+        max_readers (int): Most readers that can be registered at once
+    """
+
+    def __init__(
+        self,
+        frames,
+        width=RENDER_WIDTH,
+        height=RENDER_HEIGHT,
+        slots=DEFAULT_SLOTS,
+        max_readers=DEFAULT_MAX_READERS,
+    ):
+        self.source = frames
+        self.ring = FrameRing.create(width, height, slots, max_readers)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopping = False
+        self.registrations = 0
+        self.last_beats = {}  # Reader index -> (heartbeat, when it last changed)
+
+    @property
+    def name(self):
+        return self.ring.name
+
+    def add_reader(self, from_start=False):
+        """
+        Register a reader.
+
+        Args:
+            from_start (bool): Start at frame 0 rather than the next frame
+                written. Only valid before the first slot is reused.
+
+        Returns:
+            ReaderHandle: Pass to FrameReader in the worker process
+        """
+        with self.lock:
+            free = np.flatnonzero(self.ring.cursors == FREE)
+            if len(free) == 0:
+                raise RuntimeError(f"All {self.ring.max_readers} readers in use")
+            index = int(free[0])
+            write_seq = int(self.ring.header[H_WRITE_SEQ])
+            # At write_seq == slots the writer may already be refilling slot 0
+            if from_start and write_seq >= self.ring.slots:
+                raise RuntimeError("Frame 0 has already been overwritten")
+            self.registrations += 1
+            self.ring.tokens[index] = self.registrations
+            self.ring.pids[index] = 0
+            self.ring.beats[index] = 0
+            self.ring.cursors[index] = 0 if from_start else write_seq
+            self.last_beats[index] = (0, time.perf_counter())
+        return ReaderHandle(self.name, index, self.registrations)
+
+    def _release_dead_readers(self, oldest):
+        # Called with the lock held, for the readers holding the writer up
+        now = time.perf_counter()
+        ring = self.ring
+        for index in np.flatnonzero((ring.cursors != FREE) & (ring.cursors <= oldest)):
+            index = int(index)
+            beat = int(ring.beats[index])
+            last_beat, since = self.last_beats.get(index, (beat, now))
+            if beat != last_beat:
+                self.last_beats[index] = (beat, now)
+            elif now - since > READER_TIMEOUT:
+                ring.cursors[index] = FREE
+                ring.tokens[index] = 0
+                self.last_beats.pop(index, None)
+
+    def _wait_for_readers(self, seq):
+        # Slot seq % slots may be reused once every reader is past seq - slots
+        oldest = seq - self.ring.slots
+        next_check = time.perf_counter() + LIVENESS_INTERVAL
+        while not self.stopping:
+            with self.lock:
+                cursors = self.ring.cursors
+                active = cursors[cursors != FREE]
+                if len(active) == 0 or active.min() > oldest:
+                    return True
+                if time.perf_counter() > next_check:
+                    self._release_dead_readers(oldest)
+                    next_check = time.perf_counter() + LIVENESS_INTERVAL
+            time.sleep(POLL_INTERVAL)
+        return False
+
+    def run(self):
+        """Write every frame from the source into the ring, then mark it closed."""
+        ring = self.ring
+        seq = 0
+        try:
+            for frame in self.source:
+                if not self._wait_for_readers(seq):
+                    break
+                slot = seq % ring.slots
+                ring.frames[slot] = frame
+                ring.slot_seq[slot] = seq
+                ring.header[H_WRITE_SEQ] = seq + 1
+                seq += 1
+        finally:
+            ring.header[H_CLOSED] = 1
+        return seq
+
+    def start(self):
+        """Run the writer on a background thread."""
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def join(self, timeout=None):
+        if self.thread:
+            self.thread.join(timeout)
+
+    def close(self):
+        """Stop the writer and free the shared memory."""
+        self.stopping = True
+        self.join()
+        close = getattr(self.source, "close", None)
+        if close:
+            close()
+        self.ring.close()
+
+
+class ReaderHandle:
+    """
+    What a worker process needs to attach: the block name, cursor index and
+    the registration token that proves the slot is still this reader's.
+    """
+
+    def __init__(self, name, index, token):
+        self.name = name
+        self.index = index
+        self.token = token
+
+
+class FrameReader:
+    """
+    Reads frames from a FrameService in another process.
+
+    Frames are numpy views straight into shared memory. A view stays valid
+    until the next call to read() (or close()), which releases the slot back
+    to the writer; copy it if you need it longer.
+
+    Each read() is a heartbeat. A worker that spends longer than
+    READER_TIMEOUT on one frame should call heartbeat() now and then, or the
+    writer releases it.
+    """
+
+    def __init__(self, handle):
+        self.ring = FrameRing.attach(handle.name)
+        self.index = handle.index
+        self.token = handle.token
+        self.pid = os.getpid()
+        self.holding = False
+        ring = self.ring
+        # A slot released by the writer may already belong to a new reader,
+        # attached (pid set) or not (token changed); leave it alone
+        if (
+            ring.tokens[self.index] != self.token
+            or ring.pids[self.index] != 0
+            or ring.cursors[self.index] == FREE
+        ):
+            ring.close()
+            raise ReaderReleased("Reader was released before it attached")
+        ring.pids[self.index] = self.pid
+        self.heartbeat()
+
+    def owns_slot(self):
+        ring = self.ring
+        return (
+            ring.tokens[self.index] == self.token
+            and ring.pids[self.index] == self.pid
+            and ring.cursors[self.index] != FREE
+        )
+
+    def read(self, timeout=None):
+        """
+        Wait for the next frame.
+
+        Args:
+            timeout (float): Seconds to wait, or None to wait forever
+
+        Returns:
+            tuple: (sequence number, frame view), or None at the end of the
+                stream or on timeout
+
+        Raises:
+            ReaderReleased: If the writer freed this reader
+        """
+        ring = self.ring
+        cursors = ring.cursors
+        if not self.owns_slot():
+            raise ReaderReleased("Reader was released by the writer")
+        self.heartbeat()
+        seq = int(cursors[self.index])
+        if self.holding:
+            seq += 1
+            cursors[self.index] = seq
+            self.holding = False
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while ring.header[H_WRITE_SEQ] <= seq:
+            if ring.header[H_CLOSED]:
+                return None
+            if deadline is not None and time.perf_counter() > deadline:
+                return None
+            time.sleep(POLL_INTERVAL)
+        slot = seq % ring.slots
+        if ring.slot_seq[slot] != seq:
+            raise ReaderReleased(f"Frame {seq} was overwritten")
+        self.holding = True
+        return seq, ring.frames[slot]
+
+    def heartbeat(self):
+        """Tell the writer this reader is still alive."""
+        if self.owns_slot():
+            self.ring.beats[self.index] += 1
+
+    def __iter__(self):
+        while True:
+            item = self.read()
+            if item is None:
+                return
+            yield item
+
+    def close(self):
+        """Give up the reader slot so the writer stops waiting for it."""
+        if self.ring.cursors is not None:
+            # The slot may have been released and handed to another reader
+            if self.owns_slot():
+                self.ring.cursors[self.index] = FREE
+            self.ring.close()
+
+
+def decode_frames(path, width=RENDER_WIDTH, height=RENDER_HEIGHT):
+    """
+    Decode a video to rgb24 frames scaled to a fixed size.
+
+    Scaling in ffmpeg keeps every slot the same size whatever the clip, and
+    matches what the sketch renders. Accepts the same paths as /video_path,
+    including proxies from ProxyCache.
+
+    Yields:
+        array: (height, width, 3) uint8 frame, valid until the next one
+    """
+    frame_bytes = width * height * 3
+    process = (
+        ffmpeg.input(path)
+        .filter("scale", width, height)
+        .output("pipe:", format="rawvideo", pix_fmt="rgb24")
+        .global_args("-loglevel", "error")
+        .run_async(pipe_stdout=True)
+    )
+    buffer = bytearray(frame_bytes)
+    frame = np.frombuffer(buffer, np.uint8).reshape(height, width, 3)
+    try:
+        while process.stdout.readinto(buffer) == frame_bytes:
+            yield frame
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+
+def synthetic_frames(count, width=RENDER_WIDTH, height=RENDER_HEIGHT):
+    """Yield `count` generated frames, for benchmarking without a video."""
+    rng = np.random.default_rng(0)
+    pool = rng.integers(0, 255, (8, height, width, 3), dtype=np.uint8)
+    for i in range(count):
+        yield pool[i % len(pool)]
+
+
+def _consume(handle, work, results):
+    reader = FrameReader(handle)
+    frames = 0
+    checksum = 0
+    try:
+        for seq, frame in reader:
+            if work:
+                checksum += int(frame[::8, ::8].mean())
+            else:
+                checksum += int(frame[0, 0, 0])
+            frames += 1
+    finally:
+        reader.close()
+    results.put((frames, checksum))
+
+
+def benchmark(source_factory, consumers, width, height, slots, work=False):
+    """
+    Time `consumers` worker processes reading every frame of one decode.
+
+    Returns:
+        dict: Frames written, frames read per consumer and fps figures
+    """
+    service = FrameService(source_factory(), width, height, slots=slots)
+    results = multiprocessing.Queue()
+    handles = [service.add_reader(from_start=True) for _ in range(consumers)]
+    workers = [
+        multiprocessing.Process(target=_consume, args=(handle, work, results))
+        for handle in handles
+    ]
+    try:
+        for worker in workers:
+            worker.start()
+        start = time.perf_counter()
+        written = service.run()
+        read = [results.get() for _ in workers]
+        elapsed = time.perf_counter() - start
+        for worker in workers:
+            worker.join()
+    finally:
+        service.close()
+
+    total = sum(frames for frames, _ in read)
+    return {
+        "consumers": consumers,
+        "written": written,
+        "complete": all(frames == written for frames, _ in read),
+        "decode_fps": written / elapsed,
+        "aggregate_fps": total / elapsed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared-memory frame decode service")
+    parser.add_argument(
+        "video", nargs="?", help="Video to decode (synthetic if omitted)"
+    )
+    parser.add_argument("--consumers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--frames", type=int, default=600, help="Synthetic frame count")
+    parser.add_argument("--width", type=int, default=RENDER_WIDTH)
+    parser.add_argument("--height", type=int, default=RENDER_HEIGHT)
+    parser.add_argument("--slots", type=int, default=DEFAULT_SLOTS)
+    parser.add_argument(
+        "--work", action="store_true", help="Consumers average each frame"
+    )
+    args = parser.parse_args()
+
+    if args.video:
+        source = lambda: decode_frames(args.video, args.width, args.height)
+    else:
+        source = lambda: synthetic_frames(args.frames, args.width, args.height)
+
+    print(f"{'Consumers':>10}{'Frames':>9}{'Decode fps':>12}{'Aggregate fps':>15}")
+    for count in args.consumers:
+        result = benchmark(
+            source, count, args.width, args.height, args.slots, args.work
+        )
+        note = "" if result["complete"] else "  (readers missed frames)"
+        print(
+            f"{count:>10}{result['written']:>9}"
+            f"{result['decode_fps']:>12.1f}{result['aggregate_fps']:>15.1f}{note}"
+        )
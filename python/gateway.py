@@ -0,0 +1,259 @@
+import argparse
+import asyncio
+import json
+
+from aiohttp import WSMsgType, web
+
+from parameters import PARAMETERS, validate
+from python_osc import OscClient
+
+OSC_RATE = 60  # Max OSC flushes per second
+BROADCAST_INTERVAL = 0.05  # Seconds between state pushes to clients
+
+
+class Client:
+    """A connected WebSocket client with its own coalesced outbox."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.outbox = {}
+        self.ready = asyncio.Event()
+
+    def queue(self, changes):
+        # Later values overwrite earlier ones, so a slow client only ever
+        # has one pending message however far behind it falls
+        self.outbox.update(changes)
+        self.ready.set()
+
+    async def writer(self):
+        try:
+            while not self.ws.closed:
+                await self.ready.wait()
+                self.ready.clear()
+                changes, self.outbox = self.outbox, {}
+                if changes:
+                    message = json.dumps({"type": "state", "state": changes})
+                    await self.ws.send_str(message)
+        except ConnectionResetError:
+            pass
+
+
+class Gateway:
+    """
+    Bridges many WebSocket/HTTP clients to one OSC stream.
+
+    Updates from all clients land in a single state dict (last writer wins).
+    A flush task sends whatever changed to the sketch at most OSC_RATE times a
+    second, and a broadcast task pushes the changes back to every client.
+    """
+
+    def __init__(self, osc_ip="127.0.0.1", osc_port=12000, osc_rate=OSC_RATE):
+        self.osc = OscClient(osc_ip, osc_port)
+        self.osc_interval = 1.0 / osc_rate
+        self.state = {}
+        self.osc_pending = {}
+        self.broadcast_pending = {}
+        self.clients = set()
+        self.changed = asyncio.Event()
+        self.stats = {"updates": 0, "rejected": 0, "osc_messages": 0}
+
+    def apply(self, updates):
+        """
+        Validate and merge a dict of {address: value}.
+
+        Returns:
+            dict: Error messages for rejected addresses
+        """
+        errors = {}
+        for address, value in updates.items():
+            try:
+                value = validate(address, value)
+            except ValueError as e:
+                errors[address] = str(e)
+                self.stats["rejected"] += 1
+                continue
+            self.stats["updates"] += 1
+            if self.state.get(address) == value:
+                continue
+            self.state[address] = value
+            self.osc_pending[address] = value
+            self.broadcast_pending[address] = value
+            self.changed.set()
+        return errors
+
+    async def flush_osc(self):
+        while True:
+            await self.changed.wait()
+            self.changed.clear()
+            pending, self.osc_pending = self.osc_pending, {}
+            for address, value in pending.items():
+                self.osc.send_message(address, value)
+            self.stats["osc_messages"] += len(pending)
+            # Rate limit: further changes coalesce until the next flush
+            await asyncio.sleep(self.osc_interval)
+
+    async def broadcast(self):
+        while True:
+            await asyncio.sleep(BROADCAST_INTERVAL)
+            if not self.broadcast_pending:
+                continue
+            changes, self.broadcast_pending = self.broadcast_pending, {}
+            for client in self.clients:
+                client.queue(changes)
+
+    async def handle_ws(self, request):
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        client = Client(ws)
+        self.clients.add(client)
+        client.queue(self.state)
+        writer = asyncio.create_task(client.writer())
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    updates = parse_updates(json.loads(msg.data))
+                    errors = self.apply(updates)
+                except (TypeError, ValueError) as e:
+                    await ws.send_str(json.dumps({"type": "error", "message": str(e)}))
+                    continue
+                if errors:
+                    await ws.send_str(json.dumps({"type": "error", "errors": errors}))
+        finally:
+            self.clients.discard(client)
+            writer.cancel()
+        return ws
+
+    async def handle_get_state(self, request):
+        return web.json_response(self.state)
+
+    async def handle_post_state(self, request):
+        try:
+            updates = parse_updates(await request.json())
+            errors = self.apply(updates)
+        except (TypeError, ValueError) as e:
+            return web.json_response({"error": str(e)}, status=400)
+        return web.json_response(
+            {"state": self.state, "errors": errors}, status=400 if errors else 200
+        )
+
+    async def handle_parameters(self, request):
+        return web.json_response(
+            {
+                address: {
+                    "type": p.kind.__name__,
+                    "min": p.minimum,
+                    "max": p.maximum,
+                }
+                for address, p in PARAMETERS.items()
+            }
+        )
+
+    async def handle_index(self, request):
+        return web.Response(text=INDEX_HTML, content_type="text/html")
+
+    async def handle_stats(self, request):
+        return web.json_response({**self.stats, "clients": len(self.clients)})
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_get("/", self.handle_index)
+        app.router.add_get("/ws", self.handle_ws)
+        app.router.add_get("/state", self.handle_get_state)
+        app.router.add_post("/state", self.handle_post_state)
+        app.router.add_get("/parameters", self.handle_parameters)
+        app.router.add_get("/stats", self.handle_stats)
+        app.on_startup.append(self.start_tasks)
+        app.on_cleanup.append(self.stop_tasks)
+        return app
+
+    async def start_tasks(self, app):
+        self.tasks = [
+            asyncio.create_task(self.flush_osc()),
+            asyncio.create_task(self.broadcast()),
+        ]
+
+    async def stop_tasks(self, app):
+        for task in self.tasks:
+            task.cancel()
+        for client in list(self.clients):
+            await client.ws.close()
+
+
+def parse_updates(data):
+    """
+    Accept either {"address": "/size", "value": 1.2} or {"/size": 1.2, ...}.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    if "address" in data:
+        if "value" not in data:
+            raise ValueError("Missing value")
+        if not isinstance(data["address"], str):
+            raise ValueError("Address must be a string")
+        return {data["address"]: data["value"]}
+    return data
+
+
+INDEX_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Video Effects Controller</title>
+<style>
+  body { font-family: Helvetica, sans-serif; background: #2E2E2E; color: #eee; }
+  label { display: block; margin-top: 10px; }
+  input[type=range] { width: 100%; }
+</style>
+</head>
+<body>
+<h3>Video Effects Controller</h3>
+<div id="controls"></div>
+<script>
+const controls = document.getElementById("controls");
+const inputs = {};
+const ws = new WebSocket(`ws://${location.host}/ws`);
+fetch("/parameters").then(r => r.json()).then(params => {
+  for (const [address, p] of Object.entries(params)) {
+    if (p.type === "str") continue;
+    const label = document.createElement("label");
+    label.textContent = address;
+    const input = document.createElement("input");
+    input.type = "range";
+    input.min = p.min;
+    input.max = p.max;
+    input.step = p.type === "int" ? 1 : (p.max - p.min) / 200;
+    input.oninput = () => ws.send(JSON.stringify({address, value: Number(input.value)}));
+    label.appendChild(input);
+    controls.appendChild(label);
+    inputs[address] = input;
+  }
+});
+ws.onmessage = event => {
+  const msg = JSON.parse(event.data);
+  if (msg.type !== "state") return;
+  for (const [address, value] of Object.entries(msg.state)) {
+    if (inputs[address] && document.activeElement !== inputs[address]) {
+      inputs[address].value = value;
+    }
+  }
+};
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WebSocket/HTTP to OSC gateway")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--osc-ip", default="127.0.0.1")
+    parser.add_argument("--osc-port", type=int, default=12000)
+    parser.add_argument("--osc-rate", type=int, default=OSC_RATE)
+    args = parser.parse_args()
+
+    gateway = Gateway(args.osc_ip, args.osc_port, args.osc_rate)
+    print(f"Gateway listening on http://{args.host}:{args.port}/")
+    web.run_app(gateway.make_app(), host=args.host, port=args.port, print=None)
@@ -0,0 +1,163 @@
+import argparse
+import asyncio
+import json
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import aiohttp
+
+# Parameters the simulated clients wiggle
+LOAD_PARAMETERS = {
+    "/size": (0.1, 3.0),
+    "/rotation": (0.0, 3.0),
+    "/zoom": (-500.0, 500.0),
+    "/noise": (0.0, 1.0),
+    "/rgbshift": (0.0, 1.0),
+}
+
+
+async def run_client(session, url, rate, duration, results):
+    """One simulated phone: sends updates at `rate` Hz and counts state pushes."""
+    sent = 0
+    received = 0
+    async with session.ws_connect(url) as ws:
+
+        async def reader():
+            nonlocal received
+            async for msg in ws:
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    received += 1
+
+        read_task = asyncio.create_task(reader())
+        end = time.perf_counter() + duration
+        interval = 1.0 / rate
+        next_send = time.perf_counter() + random.random() * interval
+        while next_send < end:
+            await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+            address = random.choice(list(LOAD_PARAMETERS))
+            low, high = LOAD_PARAMETERS[address]
+            await ws.send_str(
+                json.dumps({"address": address, "value": random.uniform(low, high)})
+            )
+            sent += 1
+            next_send += interval
+        await asyncio.sleep(0.2)  # Let the last broadcasts arrive
+        read_task.cancel()
+    results.append((sent, received))
+
+
+async def measure_latency(session, url, samples=50):
+    """Round trip from an update to seeing it come back in a state push."""
+    latencies = []
+    async with session.ws_connect(url) as ws:
+        await ws.receive()  # Initial state
+        for i in range(samples):
+            value = round(random.uniform(0.0, 1.0), 6)
+            start = time.perf_counter()
+            await ws.send_str(json.dumps({"address": "/text_glitch", "value": value}))
+            while True:
+                msg = json.loads((await ws.receive()).data)
+                if msg.get("state", {}).get("/text_glitch") == value:
+                    break
+            latencies.append(time.perf_counter() - start)
+    return sorted(latencies)
+
+
+def count_osc(sock, stop):
+    """Count OSC datagrams reaching the fake sketch port."""
+    count = 0
+    sock.settimeout(0.1)
+    while not stop.is_set():
+        try:
+            sock.recv(65536)
+            count += 1
+        except socket.timeout:
+            pass
+    return count
+
+
+async def main(args):
+    # Stand in for the sketch so we can count what the gateway sends
+    osc_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    osc_sock.bind(("127.0.0.1", 0))
+    osc_port = osc_sock.getsockname()[1]
+    stop = threading.Event()
+    osc_count = [0]
+    counter = threading.Thread(
+        target=lambda: osc_count.__setitem__(0, count_osc(osc_sock, stop))
+    )
+    counter.start()
+
+    # The gateway runs in its own process, pinned to one core where supported
+    cmd = [
+        sys.executable,
+        "gateway.py",
+        "--host=127.0.0.1",
+        f"--port={args.port}",
+        f"--osc-port={osc_port}",
+    ]
+    if shutil.which("taskset"):
+        cmd = ["taskset", "-c", "0"] + cmd
+    gateway = subprocess.Popen(cmd, cwd=sys.path[0])
+    url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            for _ in range(50):
+                try:
+                    async with session.get(f"{url}/stats"):
+                        break
+                except aiohttp.ClientConnectionError:
+                    await asyncio.sleep(0.1)
+
+            print(
+                f"Starting {args.clients} clients at {args.rate} updates/s "
+                f"for {args.duration}s..."
+            )
+            results = []
+            start = time.perf_counter()
+            clients = [
+                run_client(session, f"{url}/ws", args.rate, args.duration, results)
+                for _ in range(args.clients)
+            ]
+            latency_task = asyncio.create_task(measure_latency(session, f"{url}/ws"))
+            await asyncio.gather(*clients)
+            latencies = await latency_task
+            elapsed = time.perf_counter() - start
+
+            async with session.get(f"{url}/stats") as response:
+                stats = await response.json()
+    finally:
+        gateway.terminate()
+        gateway.wait()
+        stop.set()
+        counter.join()
+
+    sent = sum(r[0] for r in results)
+    received = sum(r[1] for r in results)
+    print(f"\nClients connected: {len(results)}/{args.clients}")
+    print(f"Updates sent: {sent} ({sent / elapsed:.0f}/s)")
+    print(f"Updates accepted by gateway: {stats['updates']}")
+    print(f"State pushes received: {received} ({received / elapsed:.0f}/s)")
+    print(f"OSC messages to sketch: {osc_count[0]} ({osc_count[0] / elapsed:.0f}/s)")
+    print(
+        "Update to echo latency: "
+        f"p50={latencies[len(latencies) // 2] * 1000:.1f}ms "
+        f"p90={latencies[int(len(latencies) * 0.9)] * 1000:.1f}ms "
+        f"max={latencies[-1] * 1000:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the OSC gateway")
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--rate", type=float, default=10.0, help="Updates/s per client")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8799)
+    asyncio.run(main(parser.parse_args()))
@@ -7,6 +7,7 @@ import time
 import signal
 import platform
 from video_controller import VideoEffectsController
+from profiler import ControllerProfiler, profiling_requested
 
 
 class IntegratedLauncher:
@@ -73,8 +74,16 @@ class IntegratedLauncher:
             row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5
         )
 
+        # Profiling mode (--profile) has to hook the handlers before the UI is built
+        self.profiler = None
+        if profiling_requested(sys.argv):
+            self.profiler = ControllerProfiler(self.root)
+            self.profiler.instrument(VideoEffectsController)
+
         # Initialize controller (but don't show it yet)
         self.controller = VideoEffectsController(self.controller_frame)
+        if self.profiler:
+            self.profiler.attach(self.controller)
         self.controller.main_frame.grid_remove()  # Hide until started
 
         # Find Processing path
@@ -178,6 +187,9 @@ class IntegratedLauncher:
     def on_closing(self):
         """Handle window closing"""
         self.stop_all()
+        self.controller.shutdown()
+        if self.profiler:
+            self.profiler.export()
         self.root.destroy()
 
     def open_file(self, *args):
@@ -0,0 +1,238 @@
+import os
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk, filedialog
+
+# Treeview gets slow to fill beyond a few thousand rows; filter to narrow down
+MAX_ROWS = 2000
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return ""
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+class LibraryBrowser:
+    def __init__(self, parent, library, on_select):
+        """
+        Window for browsing and filtering the media library.
+
+        Args:
+            parent: Tk widget that owns the window
+            library (MediaLibrary): Library to browse
+            on_select (callable): Called with the clip path when one is loaded
+        """
+        self.library = library
+        self.on_select = on_select
+        # Results from worker threads, handled on the Tk thread in poll()
+        self.events = queue.Queue()
+        self.preview_image = None
+        self.selected_clip = None
+        self.closed = False
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Media Library")
+        self.window.geometry("900x600")
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(1, weight=1)
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.create_filter_controls()
+        self.create_clip_list()
+        self.create_preview()
+
+        self.refresh()
+        self.poll()
+
+    def create_filter_controls(self):
+        filter_frame = ttk.Frame(self.window, padding=5)
+        filter_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E))
+        filter_frame.columnconfigure(1, weight=1)
+
+        ttk.Label(filter_frame, text="Filter:").grid(row=0, column=0, padx=2)
+        self.filter_var = tk.StringVar()
+        filter_entry = ttk.Entry(filter_frame, textvariable=self.filter_var)
+        filter_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=2)
+        filter_entry.bind("<KeyRelease>", lambda event: self.refresh())
+
+        self.codec_var = tk.StringVar(value="All")
+        self.codec_box = ttk.Combobox(
+            filter_frame, textvariable=self.codec_var, width=10, state="readonly"
+        )
+        self.codec_box.grid(row=0, column=2, padx=2)
+        self.codec_box.bind("<<ComboboxSelected>>", lambda event: self.refresh())
+
+        ttk.Button(filter_frame, text="Add Folder", command=self.on_add_folder).grid(
+            row=0, column=3, padx=2
+        )
+        self.scan_button = ttk.Button(
+            filter_frame, text="Rescan", command=self.on_rescan
+        )
+        self.scan_button.grid(row=0, column=4, padx=2)
+
+        self.status_label = ttk.Label(filter_frame, text="")
+        self.status_label.grid(row=1, column=0, columnspan=5, sticky=tk.W, pady=2)
+
+    def create_clip_list(self):
+        list_frame = ttk.Frame(self.window)
+        list_frame.grid(row=1, column=0, sticky=(tk.N, tk.S, tk.E, tk.W), padx=5)
+        list_frame.columnconfigure(0, weight=1)
+        list_frame.rowconfigure(0, weight=1)
+
+        columns = ("resolution", "fps", "codec", "duration")
+        self.tree = ttk.Treeview(list_frame, columns=columns, selectmode="browse")
+        self.tree.heading("#0", text="Name")
+        self.tree.heading("resolution", text="Resolution")
+        self.tree.heading("fps", text="FPS")
+        self.tree.heading("codec", text="Codec")
+        self.tree.heading("duration", text="Duration")
+        self.tree.column("#0", width=320)
+        for column in columns:
+            self.tree.column(column, width=90, anchor=tk.CENTER)
+        self.tree.grid(row=0, column=0, sticky=(tk.N, tk.S, tk.E, tk.W))
+
+        scrollbar = ttk.Scrollbar(
+            list_frame, orient=tk.VERTICAL, command=self.tree.yview
+        )
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        self.tree.bind("<<TreeviewSelect>>", self.on_clip_select)
+        self.tree.bind("<Double-1>", lambda event: self.on_load())
+
+    def create_preview(self):
+        preview_frame = ttk.Frame(self.window, padding=5)
+        preview_frame.grid(row=1, column=1, sticky=(tk.N, tk.E, tk.W))
+
+        self.preview_label = ttk.Label(preview_frame, text="No clip selected")
+        self.preview_label.grid(row=0, column=0, pady=5)
+        ttk.Button(preview_frame, text="🎬 Load", command=self.on_load).grid(
+            row=1, column=0, pady=5
+        )
+
+    def refresh(self):
+        codec = self.codec_var.get()
+        clips = self.library.query(
+            text=self.filter_var.get().strip() or None,
+            codec=None if codec == "All" else codec,
+            limit=MAX_ROWS + 1,
+        )
+        self.clips = {clip["path"]: clip for clip in clips[:MAX_ROWS]}
+
+        self.tree.delete(*self.tree.get_children())
+        for clip in clips[:MAX_ROWS]:
+            resolution = f"{clip['width']}x{clip['height']}" if clip["width"] else ""
+            fps = f"{clip['fps']:.2f}" if clip["fps"] else ""
+            self.tree.insert(
+                "",
+                tk.END,
+                iid=clip["path"],
+                text=clip["name"],
+                values=(
+                    resolution,
+                    fps,
+                    clip["codec"] or "",
+                    format_duration(clip["duration"]),
+                ),
+            )
+
+        self.codec_box["values"] = ["All"] + self.library.codecs()
+        shown = f"first {MAX_ROWS}" if len(clips) > MAX_ROWS else str(len(clips))
+        status = f"Showing {shown} clips"
+        errors = self.library.error_count()
+        if errors:
+            status += f", {errors} unreadable"
+        self.status_label.config(text=status)
+
+    def on_add_folder(self):
+        folder = filedialog.askdirectory(parent=self.window)
+        if folder:
+            self.library.add_folder(folder)
+            self.on_rescan()
+
+    def on_rescan(self):
+        self.scan_button.config(state="disabled")
+        self.status_label.config(text="Scanning...")
+
+        def run():
+            def progress(done, total):
+                self.events.put(("progress", (done, total)))
+
+            try:
+                self.events.put(("scanned", self.library.scan(progress)))
+            except Exception as e:
+                self.events.put(("scan_error", e))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def on_clip_select(self, event):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        self.selected_clip = selection[0]
+        clip = self.clips[self.selected_clip]
+        thumb = self.library.request_thumbnail(
+            clip, lambda path, thumb: self.events.put(("thumbnail", (path, thumb)))
+        )
+        if thumb:
+            self.show_preview(thumb)
+        else:
+            self.preview_label.config(image="", text="Loading preview...")
+
+    def show_preview(self, thumb):
+        try:
+            self.preview_image = tk.PhotoImage(file=thumb)
+            self.preview_label.config(image=self.preview_image, text="")
+        except tk.TclError:
+            self.preview_label.config(image="", text="No preview")
+
+    def on_load(self):
+        if self.selected_clip and os.path.exists(self.selected_clip):
+            self.on_select(self.selected_clip)
+
+    def poll(self):
+        if self.closed:
+            return
+        while True:
+            try:
+                kind, data = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                self.status_label.config(text=f"Probing {data[0]}/{data[1]}...")
+            elif kind == "scanned":
+                self.scan_button.config(state="normal")
+                self.refresh()
+                self.status_label.config(
+                    text=f"{self.status_label.cget('text')} "
+                    f"({data['added']} added, {data['updated']} updated, "
+                    f"{data['removed']} removed)"
+                )
+                if data["failed"]:
+                    self.status_label.config(
+                        text=f"{self.status_label.cget('text')} - "
+                        f"{data['failed']} couldn't be probed, will retry"
+                    )
+                if data["unavailable"]:
+                    self.status_label.config(
+                        text=f"{self.status_label.cget('text')} - unavailable: "
+                        + ", ".join(data["unavailable"])
+                    )
+            elif kind == "scan_error":
+                self.scan_button.config(state="normal")
+                self.status_label.config(text=f"Scan failed: {data}")
+            elif kind == "thumbnail":
+                path, thumb = data
+                if path == self.selected_clip:
+                    if thumb:
+                        self.show_preview(thumb)
+                    else:
+                        self.preview_label.config(image="", text="No preview")
+        self.window.after(100, self.poll)
+
+    def on_close(self):
+        self.closed = True
+        self.window.destroy()
@@ -1,5 +1,7 @@
+import sys
 import tkinter as tk
 from video_controller import VideoEffectsController
+from profiler import ControllerProfiler, profiling_requested
 
 
 def main():
@@ -13,8 +15,16 @@ def main():
     # Configure the window style
     root.configure(bg="#2E2E2E")
 
+    # Profiling mode (--profile) has to hook the handlers before the UI is built
+    profiler = None
+    if profiling_requested(sys.argv):
+        profiler = ControllerProfiler(root)
+        profiler.instrument(VideoEffectsController)
+
     # Create and start the controller
     app = VideoEffectsController(root)
+    if profiler:
+        profiler.attach(app)
 
     # Center the window on screen
     window_width = 1200
@@ -27,6 +37,10 @@ def main():
 
     # Start the application
     root.mainloop()
+    app.shutdown()
+
+    if profiler:
+        profiler.export()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,425 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ffmpeg
+
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v"}
+
+LIBRARY_DIR = os.path.join(os.path.expanduser("~"), ".video_effects")
+DEFAULT_DB_PATH = os.path.join(LIBRARY_DIR, "library.sqlite3")
+DEFAULT_THUMB_DIR = os.path.join(LIBRARY_DIR, "thumbnails")
+
+THUMB_WIDTH = 160
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    path TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS clips (
+    path TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    fps REAL,
+    codec TEXT,
+    duration REAL,
+    error TEXT,
+    scanned_at REAL
+);
+CREATE INDEX IF NOT EXISTS clips_name ON clips (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS clips_codec ON clips (codec);
+CREATE INDEX IF NOT EXISTS clips_folder ON clips (folder);
+"""
+
+
+def scan_folder(folder):
+    """
+    Walk a folder tree with os.scandir and yield video files.
+
+    Unreadable subfolders are skipped, but an unreadable root (an unmounted
+    drive, a missing share) raises rather than looking like an empty folder.
+
+    Args:
+        folder (str): Root folder to scan
+
+    Yields:
+        tuple: (path, size, mtime_ns) for every video file found
+
+    Raises:
+        OSError: If the root folder can't be listed
+    """
+    stack = [folder]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = os.scandir(current)
+        except OSError:
+            if current == folder:
+                raise
+            continue
+        try:
+            with entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in VIDEO_EXTENSIONS:
+                        # DirEntry.stat() is cached from the directory listing
+                        # on Windows and costs one syscall elsewhere
+                        stat = entry.stat()
+                        yield entry.path, stat.st_size, stat.st_mtime_ns
+        except OSError:
+            continue
+
+
+def _parse_rate(rate):
+    """Turn an ffprobe rate like '30000/1001' into a float."""
+    try:
+        num, _, den = rate.partition("/")
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def probe_clip(path):
+    """
+    Read clip metadata with ffprobe.
+
+    Args:
+        path (str): Path to the video file
+
+    Returns:
+        dict: width, height, fps, codec, duration and error (None on success).
+            Failures that say nothing about the file itself, like ffprobe
+            missing, also set transient so they aren't stored.
+    """
+    try:
+        info = ffmpeg.probe(path)
+    except ffmpeg.Error as e:
+        error = e.stderr.decode("utf8", "replace").strip() if e.stderr else str(e)
+        return {"error": error or "ffprobe failed"}
+    except Exception as e:
+        return {"error": str(e), "transient": True}
+
+    video = next(
+        (s for s in info.get("streams", []) if s.get("codec_type") == "video"), None
+    )
+    if video is None:
+        return {"error": "No video stream"}
+
+    duration = video.get("duration") or info.get("format", {}).get("duration")
+    return {
+        "width": video.get("width"),
+        "height": video.get("height"),
+        "fps": _parse_rate(
+            video.get("avg_frame_rate") or video.get("r_frame_rate", "")
+        ),
+        "codec": video.get("codec_name"),
+        "duration": float(duration) if duration else None,
+        "error": None,
+    }
+
+
+def make_thumbnail(path, output_file, width=THUMB_WIDTH, at_seconds=1.0):
+    """Grab a single frame from a clip and save it as a PNG thumbnail."""
+    (
+        ffmpeg.input(path, ss=at_seconds)
+        .filter("scale", width, -2)
+        .output(output_file, vframes=1)
+        .overwrite_output()
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+
+
+class MediaLibrary:
+    """
+    Index of video clips in the configured folders.
+
+    Metadata lives in a local SQLite database so listing and filtering never
+    touch the files themselves. Rescans only probe files whose size or mtime
+    changed since the last scan.
+    """
+
+    def __init__(
+        self,
+        db_path=DEFAULT_DB_PATH,
+        thumb_dir=DEFAULT_THUMB_DIR,
+        probe_workers=8,
+        thumb_workers=2,
+    ):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        os.makedirs(thumb_dir, exist_ok=True)
+        self.db_path = db_path
+        self.thumb_dir = thumb_dir
+        self.probe_workers = probe_workers
+        self.local = threading.local()
+        self.scan_lock = threading.Lock()
+
+        # Thumbnails come from a small fixed pool so browsing never starts
+        # more than a couple of ffmpeg processes at once
+        self.thumb_pool = ThreadPoolExecutor(
+            max_workers=thumb_workers, thread_name_prefix="thumb"
+        )
+        self.thumb_pending = {}
+        self.thumb_lock = threading.Lock()
+
+        self.db.executescript(SCHEMA)
+
+    @property
+    def db(self):
+        # SQLite connections can't be shared between threads, so the Tk thread
+        # and the scan thread each get their own
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self.local.conn = conn
+        return conn
+
+    def add_folder(self, folder):
+        with self.db:
+            self.db.execute(
+                "INSERT OR IGNORE INTO folders (path) VALUES (?)",
+                (os.path.abspath(folder),),
+            )
+
+    def remove_folder(self, folder):
+        folder = os.path.abspath(folder)
+        with self.db:
+            self.db.execute("DELETE FROM folders WHERE path = ?", (folder,))
+            self.db.execute("DELETE FROM clips WHERE folder = ?", (folder,))
+
+    def folders(self):
+        return [row["path"] for row in self.db.execute("SELECT path FROM folders")]
+
+    def scan(self, progress=None):
+        """
+        Rescan all configured folders.
+
+        Args:
+            progress (callable): Optional progress(done, total) for probing
+
+        Returns:
+            dict: Counts of added, updated, removed and unchanged clips, of
+                probes that failed without a result (failed, retried next
+                scan), of stored clips ffprobe couldn't read (errors), and the
+                list of folders that couldn't be listed
+        """
+        with self.scan_lock:
+            return self._scan(progress)
+
+    def _scan(self, progress):
+        known = {}
+        clip_folders = {}
+        errored = set()
+        for row in self.db.execute(
+            "SELECT path, folder, size, mtime_ns, error FROM clips"
+        ):
+            known[row["path"]] = (row["size"], row["mtime_ns"])
+            clip_folders[row["path"]] = row["folder"]
+            if row["error"] is not None:
+                errored.add(row["path"])
+        seen = set()
+        to_probe = []
+        unavailable = []
+        for folder in self.folders():
+            try:
+                found = list(scan_folder(folder))
+            except OSError:
+                unavailable.append(folder)
+                continue
+            for path, size, mtime_ns in found:
+                seen.add(path)
+                # Clips that failed to probe get another try every rescan
+                if known.get(path) != (size, mtime_ns) or path in errored:
+                    to_probe.append((path, folder, size, mtime_ns))
+
+        # Keep clips from folders that couldn't be listed until they come back
+        removed = [
+            path
+            for path in known
+            if path not in seen and clip_folders[path] not in unavailable
+        ]
+        stats = {
+            "removed": len(removed),
+            "unchanged": len(seen) - len(to_probe),
+            "unavailable": unavailable,
+        }
+
+        # ffprobe is a subprocess, so threads are enough to run them in parallel
+        rows = []
+        failed = 0
+        with ThreadPoolExecutor(max_workers=self.probe_workers) as pool:
+            paths = [item[0] for item in to_probe]
+            for i, (item, meta) in enumerate(
+                zip(to_probe, pool.map(probe_clip, paths))
+            ):
+                path, folder, size, mtime_ns = item
+                if progress:
+                    progress(i + 1, len(to_probe))
+                if meta.get("transient"):
+                    # Keep the old row, if any, so the clip is probed again
+                    failed += 1
+                    continue
+                rows.append(
+                    (
+                        path,
+                        os.path.basename(path),
+                        folder,
+                        size,
+                        mtime_ns,
+                        meta.get("width"),
+                        meta.get("height"),
+                        meta.get("fps"),
+                        meta.get("codec"),
+                        meta.get("duration"),
+                        meta.get("error"),
+                        time.time(),
+                    )
+                )
+
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO clips VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.db.executemany(
+                "DELETE FROM clips WHERE path = ?", [(path,) for path in removed]
+            )
+        stats["added"] = sum(1 for row in rows if row[0] not in known)
+        stats["updated"] = len(rows) - stats["added"]
+        stats["failed"] = failed
+        stats["errors"] = self.error_count()
+        return stats
+
+    def error_count(self):
+        """Number of clips ffprobe couldn't read, which query() leaves out."""
+        return self.db.execute(
+            "SELECT COUNT(*) FROM clips WHERE error IS NOT NULL"
+        ).fetchone()[0]
+
+    def query(self, text=None, codec=None, min_height=None, limit=None):
+        """
+        List clips, optionally filtered.
+
+        Args:
+            text (str): Case-insensitive substring of the file name
+            codec (str): Exact codec name (e.g. 'h264', 'hevc')
+            min_height (int): Minimum vertical resolution
+            limit (int): Maximum number of rows
+
+        Returns:
+            list: sqlite3.Row objects ordered by name
+        """
+        sql = "SELECT * FROM clips WHERE error IS NULL"
+        args = []
+        if text:
+            sql += " AND name LIKE ?"
+            args.append(f"%{text}%")
+        if codec:
+            sql += " AND codec = ?"
+            args.append(codec)
+        if min_height:
+            sql += " AND height >= ?"
+            args.append(min_height)
+        sql += " ORDER BY name COLLATE NOCASE"
+        if limit:
+            sql += " LIMIT ?"
+            args.append(limit)
+        return self.db.execute(sql, args).fetchall()
+
+    def codecs(self):
+        return [
+            row["codec"]
+            for row in self.db.execute(
+                "SELECT DISTINCT codec FROM clips WHERE codec IS NOT NULL ORDER BY codec"
+            )
+        ]
+
+    def thumbnail_path(self, clip):
+        """Thumbnail file for a clip row; the name changes when the clip does."""
+        raw = f"{clip['path']}|{clip['size']}|{clip['mtime_ns']}"
+        return os.path.join(
+            self.thumb_dir, hashlib.sha1(raw.encode("utf8")).hexdigest() + ".png"
+        )
+
+    def request_thumbnail(self, clip, callback):
+        """
+        Get a thumbnail for a clip row.
+
+        Returns the thumbnail path straight away if it is on disk. Otherwise a
+        job is queued on the thumbnail pool, None is returned and
+        ``callback(clip_path, thumb_path)`` is called from the worker thread
+        (thumb_path is None if ffmpeg failed).
+        """
+        thumb = self.thumbnail_path(clip)
+        if os.path.exists(thumb):
+            return thumb
+
+        with self.thumb_lock:
+            future = self.thumb_pending.get(thumb)
+            if future is None:
+                at = min(1.0, (clip["duration"] or 0) / 2)
+                future = self.thumb_pool.submit(
+                    self._build_thumbnail, clip["path"], thumb, at
+                )
+                self.thumb_pending[thumb] = future
+
+        def done(f):
+            callback(clip["path"], None if f.exception() else f.result())
+
+        future.add_done_callback(done)
+        return None
+
+    def _build_thumbnail(self, path, thumb, at_seconds):
+        partial = thumb + ".partial.png"
+        try:
+            make_thumbnail(path, partial, at_seconds=at_seconds)
+            os.replace(partial, thumb)
+            return thumb
+        finally:
+            with self.thumb_lock:
+                self.thumb_pending.pop(thumb, None)
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def shutdown(self):
+        self.thumb_pool.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    import sys
+
+    library = MediaLibrary()
+    for folder in sys.argv[1:]:
+        library.add_folder(folder)
+
+    start = time.perf_counter()
+    stats = library.scan(
+        progress=lambda done, total: print(f"\rProbing {done}/{total}", end="")
+    )
+    print(f"\nScan finished in {time.perf_counter() - start:.2f}s")
+    print(
+        f"Added: {stats['added']}  Updated: {stats['updated']}  "
+        f"Removed: {stats['removed']}  Unchanged: {stats['unchanged']}"
+    )
+    if stats["failed"]:
+        print(f"Probe failed, will retry on the next scan: {stats['failed']}")
+    if stats["errors"]:
+        print(f"Unreadable clips (hidden): {stats['errors']}")
+    for folder in stats["unavailable"]:
+        print(f"Folder unavailable, clips kept: {folder}")
+
+    start = time.perf_counter()
+    clips = library.query()
+    print(f"Listed {len(clips)} clips in {(time.perf_counter() - start) * 1000:.1f} ms")
+    library.shutdown()
@@ -0,0 +1,70 @@
+from collections import namedtuple
+
+Parameter = namedtuple("Parameter", ["kind", "minimum", "maximum"])
+
+# Render size of the VideoEffects sketch (size(800, 600, P3D))
+RENDER_WIDTH = 800
+RENDER_HEIGHT = 600
+
+# OSC parameters the VideoEffects sketch understands, with the same ranges as
+# the controller's widgets. /source and /video_path are left out on purpose:
+# they load files and are only sent by the controller itself.
+PARAMETERS = {
+    "/effect": Parameter(int, 0, 8),
+    "/colormode": Parameter(int, 0, 4),
+    "/base_hue": Parameter(float, 0.0, 360.0),
+    "/rotation": Parameter(float, 0.0, 3.0),
+    "/effect_speed": Parameter(float, 0.1, 3.0),
+    "/zoom": Parameter(float, -500.0, 500.0),
+    "/size": Parameter(float, 0.1, 3.0),
+    "/brightness": Parameter(float, 0.0, 2.0),
+    "/saturation": Parameter(float, 0.0, 2.0),
+    "/rgbshift": Parameter(float, 0.0, 1.0),
+    "/noise": Parameter(float, 0.0, 1.0),
+    "/polygon_sides": Parameter(int, 3, 12),
+    "/ghost": Parameter(int, 0, 1),
+    "/mouse_control": Parameter(int, 0, 1),
+    "/background": Parameter(int, 0, 1),
+    "/recording": Parameter(int, 0, 1),
+    "/background_stage": Parameter(int, 0, 4),
+    "/text": Parameter(str, None, None),
+    "/text_size": Parameter(float, 12.0, 72.0),
+    "/text_color": Parameter(int, 0, 3),
+    "/text_glitch": Parameter(float, 0.0, 1.0),
+    "/text_rgb": Parameter(float, 0.0, 1.0),
+}
+
+MAX_TEXT_LENGTH = 500
+
+
+def validate(address, value):
+    """
+    Check a parameter update and coerce it to the type the sketch expects.
+
+    Numbers are clamped to the parameter's range.
+
+    Args:
+        address (str): OSC address, e.g. '/size'
+        value: New value
+
+    Returns:
+        The coerced value
+
+    Raises:
+        ValueError: Unknown address or a value of the wrong type
+    """
+    parameter = PARAMETERS.get(address)
+    if parameter is None:
+        raise ValueError(f"Unknown parameter: {address}")
+
+    if parameter.kind is str:
+        if not isinstance(value, str):
+            raise ValueError(f"{address} expects a string")
+        return value[:MAX_TEXT_LENGTH]
+
+    if isinstance(value, bool):
+        value = int(value)
+    if not isinstance(value, (int, float)) or value != value:  # rejects NaN
+        raise ValueError(f"{address} expects a number")
+    value = min(max(value, parameter.minimum), parameter.maximum)
+    return parameter.kind(value)
@@ -0,0 +1,285 @@
+import argparse
+import time
+
+import numpy as np
+
+from parameters import RENDER_HEIGHT, RENDER_WIDTH
+
+# Processing's default camera: eye at (height/2) / tan(PI/6) in front of the scene
+FIELD_OF_VIEW = np.pi / 3
+
+
+def hue_to_rgb(hue, saturation=0.8, value=1.0):
+    """Vectorised HSB -> RGB for hues in degrees, as tint() does in HSB mode."""
+    h = (hue % 360.0) / 60.0
+    c = value * saturation
+    x = c * (1 - np.abs(h % 2 - 1))
+    zero = np.zeros_like(h)
+    sector = h.astype(np.int32)
+    r = np.choose(sector % 6, [c + zero, x, zero, zero, x, c + zero])
+    g = np.choose(sector % 6, [x, c + zero, c + zero, x, zero, zero])
+    b = np.choose(sector % 6, [zero, zero, x, c + zero, c + zero, x])
+    m = value - c
+    return np.stack([r + m, g + m, b + m], axis=1).astype(np.float32)
+
+
+class ParticleSystem:
+    """
+    Struct-of-arrays version of Particle3D.
+
+    Position, velocity, life, size, hue and texture coordinates each live in
+    one contiguous array, and update() / respawn() work on all particles at
+    once instead of calling a method per particle.
+    """
+
+    def __init__(
+        self,
+        count=100,
+        size_multiplier=1.0,
+        color_speed=1.0,
+        distort=0.0,
+        lifetime=None,
+        seed=None,
+    ):
+        """
+        Args:
+            count (int): Number of particles (the sketch uses 100)
+            size_multiplier (float): Same as /size in the sketch
+            color_speed (float): Hue change per frame
+            distort (float): Random jitter per frame (distortAmount)
+            lifetime (tuple): Optional (min, max) frames before respawn;
+                the sketch only respawns particles that fly too far
+            seed (int): Random seed
+        """
+        self.count = count
+        self.size_multiplier = size_multiplier
+        self.color_speed = color_speed
+        self.distort = distort
+        self.lifetime = lifetime
+        self.rng = np.random.default_rng(seed)
+
+        self.pos = np.empty((count, 3), np.float32)
+        self.vel = np.empty((count, 3), np.float32)
+        self.life = np.empty(count, np.float32)
+        self.size = np.empty(count, np.float32)
+        self.hue = np.empty(count, np.float32)
+        self.tex = np.empty((count, 2), np.float32)
+        self.jitter = np.empty((count, 3), np.float32)
+        self.dist2 = np.empty(count, np.float32)
+
+        self.respawn(np.arange(count))
+
+    def _random_unit(self, n):
+        v = self.rng.standard_normal((n, 3), dtype=np.float32)
+        v /= np.maximum(np.linalg.norm(v, axis=1, keepdims=True), 1e-6)
+        return v
+
+    def respawn(self, index):
+        """Reset the given particles, like Particle3D.reset()."""
+        n = len(index)
+        if n == 0:
+            return
+        radius = self.rng.uniform(100, 300, n).astype(np.float32)
+        self.pos[index] = (
+            self._random_unit(n) * (radius * self.size_multiplier)[:, None]
+        )
+        self.vel[index] = self._random_unit(n) * 2
+        self.size[index] = self.rng.uniform(10, 30, n) * self.size_multiplier
+        self.hue[index] = self.rng.uniform(0, 360, n)
+        if self.lifetime:
+            self.life[index] = self.rng.uniform(*self.lifetime, n)
+        else:
+            self.life[index] = np.inf
+        # Texture coordinates from the spawn position, as display() maps
+        # pos.x / pos.y from -300..300 onto the frame
+        self.tex[index] = np.clip((self.pos[index, :2] + 300) / 600, 0, 1)
+
+    def update(self):
+        """Advance every particle one frame and respawn the ones that left."""
+        self.pos += self.vel
+        self.hue += self.color_speed
+        np.mod(self.hue, 360, out=self.hue)
+        if self.distort:
+            self.rng.standard_normal(out=self.jitter, dtype=np.float32)
+            self.jitter /= np.maximum(
+                np.linalg.norm(self.jitter, axis=1, keepdims=True), 1e-6
+            )
+            self.jitter *= self.distort
+            self.pos += self.jitter
+        self.life -= 1
+
+        np.einsum("ij,ij->i", self.pos, self.pos, out=self.dist2)
+        limit = (400 * self.size_multiplier) ** 2
+        self.respawn(np.flatnonzero((self.dist2 > limit) | (self.life <= 0)))
+
+
+class SpriteRasterizer:
+    """
+    Draws particles as textured, tinted square sprites into a frame buffer.
+
+    Each sprite samples a patch of the source frame around its texture
+    coordinate. Sprites are drawn far to near within each sprite size, and
+    smaller (further) sizes first, which approximates the depth order without
+    a z-buffer.
+
+    The frame buffer has a max_sprite margin on every side, so sprites can be
+    written without per-pixel bounds checks; render() returns the visible part.
+    """
+
+    def __init__(
+        self,
+        width=RENDER_WIDTH,
+        height=RENDER_HEIGHT,
+        patch=0.25,
+        max_sprite=48,
+        brightness=1.0,
+    ):
+        self.width = width
+        self.height = height
+        self.patch = patch
+        self.max_sprite = max_sprite
+        self.eye_z = (height / 2) / np.tan(FIELD_OF_VIEW / 2)
+
+        self.margin = max_sprite
+        self.padded_width = width + 2 * max_sprite
+        self.buffer = np.zeros(
+            (height + 2 * max_sprite, self.padded_width, 3), np.uint8
+        )
+        self.out = self.buffer[max_sprite:-max_sprite, max_sprite:-max_sprite]
+        self.offsets = {}
+
+        # Tint for every whole hue, as 0-256 fixed point
+        tint = hue_to_rgb(np.arange(360, dtype=np.float32)) * brightness
+        self.tint_table = np.clip(tint * 256, 0, 65535).astype(np.uint16)
+
+    def _offsets(self, k, fw):
+        # Per-size offsets into the padded frame buffer and the texture
+        key = (k, fw)
+        if key not in self.offsets:
+            dy, dx = np.divmod(np.arange(k * k, dtype=np.int32), k)
+            out_offset = dy * self.padded_width + dx
+            frac = np.arange(k, dtype=np.float32) / k
+            self.offsets[key] = (out_offset, frac[dy], frac[dx])
+        return self.offsets[key]
+
+    def render(self, system, frame, theta=0.0, zoom=0.0):
+        """
+        Rasterise a particle system.
+
+        Args:
+            system (ParticleSystem): Particles to draw
+            frame (array): (h, w, 3) uint8 texture frame
+            theta (float): Scene rotation (drawParticleEffect rotates by theta/2)
+            zoom (float): Same as /zoom, moves the scene towards the camera
+
+        Returns:
+            array: View of the reused frame buffer, (height, width, 3)
+        """
+        self.buffer.fill(0)
+        flat_out = self.buffer.reshape(-1, 3)
+        fh, fw = frame.shape[:2]
+        flat_tex = frame.reshape(-1, 3)
+
+        # rotateY(theta * 0.5), then perspective from the default camera
+        c, s = np.cos(theta * 0.5), np.sin(theta * 0.5)
+        pos = system.pos
+        x = pos[:, 0] * c + pos[:, 2] * s
+        z = pos[:, 2] * c - pos[:, 0] * s + zoom
+        depth = self.eye_z - z
+        visible = np.flatnonzero(depth > 1.0)
+        scale = self.eye_z / depth[visible]
+        sprite = (system.size[visible] * scale).astype(np.int32)
+        np.clip(sprite, 1, self.max_sprite, out=sprite)
+
+        # Sprite top-left in padded buffer coordinates; anything far off screen
+        # is clamped into the margin, which is never shown
+        k_half = sprite * 0.5
+        x0 = (self.width / 2 + x[visible] * scale - k_half).astype(np.int32)
+        y0 = (self.height / 2 + pos[visible, 1] * scale - k_half).astype(np.int32)
+        np.clip(x0 + self.margin, 0, self.padded_width - sprite, out=x0)
+        np.clip(y0 + self.margin, 0, self.buffer.shape[0] - sprite, out=y0)
+        out_base = y0 * self.padded_width + x0
+
+        # Texture patch top-left, kept inside the frame
+        patch_w = max(1, int(self.patch * fw))
+        patch_h = max(1, int(self.patch * fh))
+        tex = system.tex[visible]
+        tx0 = np.clip((tex[:, 0] * fw).astype(np.int32) - patch_w // 2, 0, fw - patch_w)
+        ty0 = np.clip((tex[:, 1] * fh).astype(np.int32) - patch_h // 2, 0, fh - patch_h)
+        tex_base = ty0 * fw + tx0
+
+        tint = self.tint_table[system.hue[visible].astype(np.int32) % 360]
+
+        # Far to near, grouped by sprite size: one sort on a combined key
+        order = np.argsort(sprite * 1e4 + z[visible], kind="stable")
+        sizes = sprite[order]
+        bounds = np.flatnonzero(np.diff(sizes)) + 1
+        for group in np.split(order, bounds):
+            if len(group) == 0:
+                continue
+            k = int(sprite[group[0]])
+            out_offset, fy, fx = self._offsets(k, fw)
+            tex_offset = (fy * patch_h).astype(np.int32) * fw + (fx * patch_w).astype(
+                np.int32
+            )
+
+            colour = flat_tex[tex_base[group, None] + tex_offset[None, :]]
+            colour = colour.astype(np.uint16)
+            colour *= tint[group, None, :]
+            colour >>= 8
+            np.minimum(colour, 255, out=colour)
+            # With repeated indices the last write wins, giving the draw order
+            flat_out[(out_base[group, None] + out_offset[None, :]).ravel()] = (
+                colour.reshape(-1, 3)
+            )
+        return self.out
+
+
+def benchmark(counts=(1000, 10000, 100000, 250000), frames=10, max_sprite=48):
+    """
+    Time update and render per frame for several particle counts.
+
+    Particles keep the sketch's sizes (10-30 at /size 1) at every count, so
+    the fill grows with the count.
+
+    Returns:
+        list: (count, update_ms, render_ms) tuples
+    """
+    rng = np.random.default_rng(0)
+    texture = rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    results = []
+    for count in counts:
+        system = ParticleSystem(count, distort=0.5, seed=0)
+        rasterizer = SpriteRasterizer(max_sprite=max_sprite)
+
+        start = time.perf_counter()
+        for _ in range(frames):
+            system.update()
+        update_ms = (time.perf_counter() - start) / frames * 1000
+
+        start = time.perf_counter()
+        for i in range(frames):
+            rasterizer.render(system, texture, theta=i * 0.01)
+        render_ms = (time.perf_counter() - start) / frames * 1000
+        results.append((count, update_ms, render_ms))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Particle engine benchmark")
+    parser.add_argument(
+        "--counts", type=int, nargs="+", default=[1000, 10000, 100000, 250000]
+    )
+    parser.add_argument("--frames", type=int, default=10)
+    parser.add_argument(
+        "--max-sprite", type=int, default=48, help="Largest sprite in pixels"
+    )
+    args = parser.parse_args()
+
+    print(f"Sprites up to {args.max_sprite}px\n")
+    print(f"{'Particles':>10}{'Update':>12}{'Render':>12}{'Total fps':>12}")
+    for count, update_ms, render_ms in benchmark(
+        args.counts, args.frames, args.max_sprite
+    ):
+        fps = 1000 / (update_ms + render_ms)
+        print(f"{count:>10}{update_ms:>10.2f}ms{render_ms:>10.2f}ms{fps:>12.1f}")
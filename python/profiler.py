@@ -0,0 +1,295 @@
+import json
+import os
+import threading
+import time
+from array import array
+
+# Inputs that can end up as an OSC message
+INPUT_EVENTS = (
+    "<ButtonPress>",
+    "<ButtonRelease>",
+    "<B1-Motion>",
+    "<KeyPress>",
+    "<KeyRelease>",
+    # The combobox popdown list is created after attach() and never gets the
+    # probe tag, but selecting from it fires this on the combobox itself
+    "<<ComboboxSelected>>",
+)
+PROBE_TAG = "ProfilerProbe"
+
+
+def profiling_requested(argv):
+    """True when profiling was asked for with --profile or VIDEO_EFFECTS_PROFILE=1."""
+    return "--profile" in argv or os.environ.get("VIDEO_EFFECTS_PROFILE") == "1"
+
+
+class RingBuffer:
+    """
+    Fixed-size store for (start, duration, label) samples.
+
+    All storage is allocated up front, so recording a sample is three array
+    writes and never allocates. Once full the oldest samples are overwritten.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.starts = array("d", bytes(8 * capacity))
+        self.durations = array("d", bytes(8 * capacity))
+        self.labels = array("H", bytes(2 * capacity))
+        self.index = 0
+        self.count = 0
+
+    def append(self, start, duration, label=0):
+        i = self.index
+        self.starts[i] = start
+        self.durations[i] = duration
+        self.labels[i] = label
+        self.index = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def samples(self):
+        """Return the stored samples oldest first."""
+        first = (self.index - self.count) % self.capacity
+        for k in range(self.count):
+            i = (first + k) % self.capacity
+            yield self.starts[i], self.durations[i], self.labels[i]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[rank]
+
+
+class ControllerProfiler:
+    """
+    Records where controller latency goes.
+
+    - time spent in each on_*_change handler
+    - time from the Tk input event to the OSC sendto call
+    - Tk mainloop lag, from an after() probe that reschedules itself
+
+    Nothing is patched until instrument() and attach() are called, so a
+    controller without a profiler runs exactly as before.
+    """
+
+    def __init__(self, root, capacity=65536, probe_interval_ms=10):
+        self.root = root
+        self.probe_interval_ms = probe_interval_ms
+        self.origin = time.perf_counter()
+        self.handlers = RingBuffer(capacity)
+        self.event_to_send = RingBuffer(capacity)
+        self.loop_lag = RingBuffer(capacity)
+        self.labels = []
+        self.label_index = {}
+        self.last_event = None
+        self.main_thread = threading.main_thread()
+        self.probe_expected = None
+
+    def label(self, name):
+        index = self.label_index.get(name)
+        if index is None:
+            index = self.label_index[name] = len(self.labels)
+            self.labels.append(name)
+        return index
+
+    def instrument(self, controller_class):
+        """
+        Time every on_*_change handler of a controller class.
+
+        Must run before the controller is created, because the widgets keep
+        references to the handlers they were built with.
+        """
+        for name, handler in list(vars(controller_class).items()):
+            if name.startswith("on_") and name.endswith("_change"):
+                setattr(controller_class, name, self.wrap_handler(name, handler))
+
+    def attach(self, controller):
+        """Watch a controller's input events and OSC sends, and start the probe."""
+        self.wrap_send(controller.osc)
+        self.install_event_probe(controller.main_frame)
+
+        # Ctrl+Shift+P writes a trace without stopping the controller
+        self.root.bind_all("<Control-P>", lambda event: self.export())
+        self.probe_expected = time.perf_counter() + self.probe_interval_ms / 1000
+        self.root.after(self.probe_interval_ms, self.probe)
+
+    def wrap_handler(self, name, handler):
+        label = self.label(name)
+        clock = time.perf_counter
+        record = self.handlers.append
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                record(start - self.origin, clock() - start, label)
+
+        timed.__name__ = handler.__name__
+        return timed
+
+    def wrap_send(self, client):
+        # SimpleUDPClient.send() is the call that does the sendto
+        send = client.send
+        clock = time.perf_counter
+
+        def timed_send(content):
+            event = self.last_event
+            if event is not None and threading.current_thread() is self.main_thread:
+                now = clock()
+                self.event_to_send.append(
+                    event - self.origin, now - event, self.label(content.address)
+                )
+            return send(content)
+
+        client.send = timed_send
+
+    def install_event_probe(self, widget):
+        # Put our tag first in every widget's bindtags so the timestamp is taken
+        # before the widget's own bindings run the handler
+        for sequence in INPUT_EVENTS:
+            self.root.bind_class(PROBE_TAG, sequence, self.on_input_event, add="+")
+        stack = [widget]
+        while stack:
+            current = stack.pop()
+            tags = current.bindtags()
+            if PROBE_TAG not in tags:
+                current.bindtags((PROBE_TAG,) + tags)
+            stack.extend(current.winfo_children())
+
+    def on_input_event(self, event):
+        # Sends made while Tk handles this event count against it; the idle
+        # callback runs once the event has been fully dispatched
+        if self.last_event is None:
+            self.root.after_idle(self.clear_event)
+        self.last_event = time.perf_counter()
+
+    def clear_event(self):
+        self.last_event = None
+
+    def probe(self):
+        now = time.perf_counter()
+        lag = max(0.0, now - self.probe_expected)
+        self.loop_lag.append(self.probe_expected - self.origin, lag)
+        self.probe_expected = now + self.probe_interval_ms / 1000
+        self.root.after(self.probe_interval_ms, self.probe)
+
+    def trace_events(self):
+        """Build Chrome trace events (timestamps in microseconds)."""
+        events = [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": 1,
+                "args": {"name": "Controller"},
+            },
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 1,
+                "tid": 1,
+                "args": {"name": "Handlers"},
+            },
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 1,
+                "tid": 2,
+                "args": {"name": "Event to sendto"},
+            },
+        ]
+        for start, duration, label in self.handlers.samples():
+            events.append(
+                {
+                    "name": self.labels[label],
+                    "cat": "handler",
+                    "ph": "X",
+                    "ts": start * 1e6,
+                    "dur": duration * 1e6,
+                    "pid": 1,
+                    "tid": 1,
+                }
+            )
+        for start, duration, label in self.event_to_send.samples():
+            events.append(
+                {
+                    "name": self.labels[label],
+                    "cat": "event_to_send",
+                    "ph": "X",
+                    "ts": start * 1e6,
+                    "dur": duration * 1e6,
+                    "pid": 1,
+                    "tid": 2,
+                }
+            )
+        for start, lag, _ in self.loop_lag.samples():
+            events.append(
+                {
+                    "name": "mainloop_lag",
+                    "cat": "mainloop",
+                    "ph": "C",
+                    "ts": start * 1e6,
+                    "pid": 1,
+                    "args": {"lag_ms": lag * 1000},
+                }
+            )
+        return events
+
+    def summary(self):
+        """Per-handler, per-address and mainloop percentiles in milliseconds."""
+
+        def stats(values):
+            values = sorted(v * 1000 for v in values)
+            return {
+                "count": len(values),
+                "p50": percentile(values, 0.50),
+                "p90": percentile(values, 0.90),
+                "p99": percentile(values, 0.99),
+                "max": values[-1] if values else 0.0,
+            }
+
+        def by_label(buffer):
+            grouped = {}
+            for _, duration, label in buffer.samples():
+                grouped.setdefault(self.labels[label], []).append(duration)
+            return {name: stats(values) for name, values in sorted(grouped.items())}
+
+        return {
+            "handlers": by_label(self.handlers),
+            "event_to_send": by_label(self.event_to_send),
+            "mainloop_lag": stats(lag for _, lag, _ in self.loop_lag.samples()),
+        }
+
+    def export(self, path=None):
+        """Write a Chrome trace JSON file and print the summary."""
+        if path is None:
+            path = f"controller-trace-{time.strftime('%Y%m%d_%H%M%S')}.json"
+        summary = self.summary()
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "traceEvents": self.trace_events(),
+                    "displayTimeUnit": "ms",
+                    "otherData": {"summary": summary},
+                },
+                f,
+            )
+
+        print(f"Trace written to: {path} (open in chrome://tracing or Perfetto)")
+        for section in ("handlers", "event_to_send"):
+            print(f"\n{section}:")
+            for name, s in summary[section].items():
+                print(
+                    f"  {name:<28} n={s['count']:<6} p50={s['p50']:.3f}ms "
+                    f"p90={s['p90']:.3f}ms p99={s['p99']:.3f}ms max={s['max']:.3f}ms"
+                )
+        s = summary["mainloop_lag"]
+        print(
+            f"\nmainloop lag: n={s['count']} p50={s['p50']:.3f}ms "
+            f"p90={s['p90']:.3f}ms p99={s['p99']:.3f}ms max={s['max']:.3f}ms"
+        )
+        return path
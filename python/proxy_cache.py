@@ -0,0 +1,356 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import ffmpeg
+
+from parameters import RENDER_HEIGHT, RENDER_WIDTH
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".video_effects", "proxies")
+DEFAULT_MAX_BYTES = 10 * 1024**3  # 10 GB
+
+# Bytes read from the start, middle and end of a file for the content hash
+HASH_CHUNK = 1024 * 1024
+
+
+def content_hash(path, chunk_size=HASH_CHUNK):
+    """
+    Hash a sample of the file contents.
+
+    Reading a whole multi-gigabyte clip would take longer than the lookup is
+    worth, so only the start, middle and end chunks are hashed. Together with
+    size and mtime this catches files replaced in place.
+
+    Args:
+        path (str): Path to the file
+        chunk_size (int): Bytes to read at each sample point
+
+    Returns:
+        str: Hex digest
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for offset in sorted(
+            {0, max(0, size // 2 - chunk_size // 2), max(0, size - chunk_size)}
+        ):
+            f.seek(offset)
+            digest.update(f.read(chunk_size))
+    return digest.hexdigest()
+
+
+def cache_key(path):
+    """Build the cache key from path, size, mtime and content hash."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    raw = f"{path}|{stat.st_size}|{stat.st_mtime_ns}|{content_hash(path)}"
+    return hashlib.sha1(raw.encode("utf8")).hexdigest()
+
+
+def transcode_proxy(
+    input_file,
+    output_file,
+    width=RENDER_WIDTH,
+    height=RENDER_HEIGHT,
+    gop=15,
+    on_start=None,
+):
+    """
+    Transcode a clip to a sketch-friendly proxy.
+
+    The proxy is scaled to fit the render size and encoded as H.264 with a
+    short GOP and fastdecode tuning, so Processing's Movie can decode and seek
+    it cheaply in realtime.
+
+    Args:
+        input_file (str): Source video
+        output_file (str): Proxy file to write
+        width (int): Maximum proxy width
+        height (int): Maximum proxy height
+        gop (int): Keyframe interval in frames (1 for all-intra)
+        on_start (callable): Optional, called with the ffmpeg Popen so the
+            caller can terminate it
+
+    Raises:
+        ffmpeg.Error: If ffmpeg fails or is terminated
+    """
+    source = ffmpeg.input(input_file)
+    video = source.video.filter(
+        "scale", width, height, force_original_aspect_ratio="decrease"
+    )
+    # libx264 with yuv420p needs even dimensions
+    video = video.filter("pad", "ceil(iw/2)*2", "ceil(ih/2)*2")
+    streams = [video]
+    if _has_audio(input_file):
+        streams.append(source.audio)
+    process = (
+        ffmpeg.output(
+            *streams,
+            output_file,
+            vcodec="libx264",
+            pix_fmt="yuv420p",
+            preset="veryfast",
+            tune="fastdecode",
+            crf=20,
+            g=gop,
+            bf=0,
+            acodec="aac",
+            movflags="+faststart",
+        )
+        .overwrite_output()
+        .global_args("-loglevel", "error")
+        .run_async(pipe_stderr=True)
+    )
+    if on_start:
+        on_start(process)
+    _, err = process.communicate()
+    if process.returncode != 0:
+        raise ffmpeg.Error("ffmpeg", None, err)
+
+
+def _has_audio(path):
+    try:
+        probe = ffmpeg.probe(path)
+    except ffmpeg.Error:
+        return False
+    return any(s.get("codec_type") == "audio" for s in probe.get("streams", []))
+
+
+class ProxyCache:
+    """
+    On-disk cache of proxy transcodes with LRU eviction under a byte budget.
+
+    Transcodes run in a background thread pool. The index is a small JSON file
+    next to the proxies, kept in least-recently-used order.
+    """
+
+    def __init__(
+        self,
+        cache_dir=DEFAULT_CACHE_DIR,
+        max_bytes=DEFAULT_MAX_BYTES,
+        width=RENDER_WIDTH,
+        height=RENDER_HEIGHT,
+        workers=2,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.width = width
+        self.height = height
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="proxy"
+        )
+        self.pending = {}  # key -> Future
+        self.processes = {}  # Proxy path -> running ffmpeg Popen
+        self.closing = False
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.entries = self._load_index()
+
+    def _load_index(self):
+        entries = OrderedDict()
+        try:
+            with open(self.index_path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return entries
+        # Drop entries whose proxy file has gone missing
+        for key, entry in sorted(saved.items(), key=lambda kv: kv[1]["last_used"]):
+            if os.path.exists(entry["proxy"]):
+                entries[key] = entry
+        return entries
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.index_path)
+
+    def total_bytes(self):
+        return sum(entry["bytes"] for entry in self.entries.values())
+
+    def lookup(self, path):
+        """Return the proxy path for a source file, or None if not cached."""
+        key = cache_key(path)
+        with self.lock:
+            return self._touch(key)
+
+    def _touch(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if not os.path.exists(entry["proxy"]):
+            del self.entries[key]
+            return None
+        entry["last_used"] = time.time()
+        self.entries.move_to_end(key)
+        self._save_index()
+        return entry["proxy"]
+
+    def _lookup_stat(self, source, stat):
+        """Cheap hit check by path, size and mtime, without hashing the file."""
+        for key, entry in reversed(self.entries.items()):
+            if (
+                entry["source"] == source
+                and entry.get("size") == stat.st_size
+                and entry.get("mtime_ns") == stat.st_mtime_ns
+            ):
+                return self._touch(key)
+        return None
+
+    def request(self, path, callback):
+        """
+        Get a proxy for a source file.
+
+        Only a stat is done here, so this is safe to call from the UI thread.
+        If the path, size and mtime match a cached proxy its path is returned
+        straight away and the callback is not called. Otherwise the content
+        hash and, on a miss, the transcode run on a worker (or an existing job
+        for the same file is joined) and None is returned;
+        ``callback(path, proxy_path, error)`` is called from the worker thread
+        when it finishes.
+
+        Args:
+            path (str): Source video
+            callback (callable): Called as callback(path, proxy_path, error)
+
+        Returns:
+            str: Proxy path on a hit, None otherwise
+        """
+        source = os.path.abspath(path)
+        stat = os.stat(source)
+        with self.lock:
+            proxy = self._lookup_stat(source, stat)
+            if proxy is not None:
+                return proxy
+            future = self.pending.get(source)
+            if future is None:
+                future = self.executor.submit(self._build, source)
+                self.pending[source] = future
+
+        def done(f):
+            error = f.exception()
+            callback(path, None if error else f.result(), error)
+
+        future.add_done_callback(done)
+        return None
+
+    def _build(self, source):
+        try:
+            stat = os.stat(source)
+            key = cache_key(source)
+            with self.lock:
+                # Entries from older indexes have no size/mtime to match on
+                proxy = self._touch(key)
+                if proxy is not None:
+                    self.entries[key]["size"] = stat.st_size
+                    self.entries[key]["mtime_ns"] = stat.st_mtime_ns
+                    self._save_index()
+                    return proxy
+            return self._transcode(key, source, stat)
+        finally:
+            with self.lock:
+                self.pending.pop(source, None)
+
+    def _transcode(self, key, source, stat):
+        proxy = os.path.join(self.cache_dir, f"{key}.mp4")
+        partial = os.path.join(self.cache_dir, f"{key}.partial.mp4")
+        try:
+            transcode_proxy(
+                source,
+                partial,
+                self.width,
+                self.height,
+                on_start=lambda process: self._track(process, proxy),
+            )
+            os.replace(partial, proxy)
+            with self.lock:
+                self.entries[key] = {
+                    "source": source,
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "proxy": proxy,
+                    "bytes": os.path.getsize(proxy),
+                    "last_used": time.time(),
+                }
+                self._evict(keep=key)
+                self._save_index()
+            return proxy
+        finally:
+            with self.lock:
+                self.processes.pop(proxy, None)
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def _track(self, process, proxy):
+        with self.lock:
+            self.processes[proxy] = process
+            closing = self.closing
+        if closing:
+            process.terminate()
+
+    def _evict(self, keep=None):
+        """Delete least recently used proxies until under the byte budget."""
+        total = self.total_bytes()
+        for key in list(self.entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            entry = self.entries.pop(key)
+            total -= entry["bytes"]
+            try:
+                os.remove(entry["proxy"])
+            except OSError:
+                pass
+
+    def shutdown(self, wait=False):
+        """
+        Cancel queued transcodes and terminate running ones.
+
+        Worker threads are joined at interpreter exit, so without this a
+        transcode would keep the process alive until ffmpeg finished. Each
+        worker removes its .partial.mp4 once its ffmpeg has exited.
+        """
+        with self.lock:
+            self.closing = True
+            running = list(self.processes.values())
+        for process in running:
+            process.terminate()
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python proxy_cache.py <video> [<video> ...]")
+        sys.exit(1)
+
+    cache = ProxyCache()
+    done_event = threading.Event()
+    remaining = [len(sys.argv) - 1]
+
+    def report(path, proxy, error):
+        if error:
+            print(f"Error creating proxy for {path}: {error}")
+        else:
+            print(f"Proxy ready: {path} -> {proxy}")
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            done_event.set()
+
+    for video in sys.argv[1:]:
+        proxy = cache.request(video, report)
+        if proxy:
+            print(f"Cache hit: {video} -> {proxy}")
+            remaining[0] -= 1
+    if remaining[0] > 0:
+        done_event.wait()
+    cache.shutdown()
+    print(f"Cache size: {cache.total_bytes() / (1024 * 1024):.1f} MB")
@@ -0,0 +1,432 @@
+import argparse
+import time
+from collections import OrderedDict
+
+import ffmpeg
+import numpy as np
+
+from parameters import RENDER_HEIGHT, RENDER_WIDTH
+
+TWO_PI = 2 * np.pi
+
+# Default cache budget: about 520 tables at 800x600
+DEFAULT_CACHE_BYTES = 1024**3
+
+
+def _polar(width, height, size):
+    """Pixel grid as radius (in sketch units, scaled by size) and angle."""
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    x -= width / 2
+    y -= height / 2
+    # The sketch is 800x600; keep its units whatever the output size
+    scale = np.float32(RENDER_WIDTH / width / size)
+    x *= scale
+    y *= scale
+    return np.hypot(x, y), np.arctan2(y, x), x, y
+
+
+def tunnel_map(width, height, size, sides, phase):
+    """
+    Looking down drawTunnelEffect's tube.
+
+    Angle around the tube picks the texture column (rotated by theta, as
+    rotateZ(theta) does) and depth, which falls off as 1/r, picks the row. The
+    tube radius wobbles with sin(z * 0.01 + theta) * 50 like the sketch.
+    """
+    r, a, _, _ = _polar(width, height, size)
+    depth = 200.0 * 400.0 / np.maximum(r, 1.0)
+    depth += np.sin(depth * 0.01 + phase) * 50
+    tx = (a + phase) / TWO_PI
+    ty = depth / 800.0
+    return tx, ty, r > 20.0
+
+
+def spherical_map(width, height, size, sides, phase):
+    """drawSphericalEffect: a radius-200 textured sphere spinning about Y."""
+    r, _, x, y = _polar(width, height, size)
+    radius = 200.0
+    nx = x / radius
+    ny = y / radius
+    inside = nx * nx + ny * ny < 1.0
+    nz = np.sqrt(np.maximum(0.0, 1.0 - nx * nx - ny * ny))
+    lat = np.arcsin(np.clip(ny, -1.0, 1.0))
+    lon = np.arctan2(nx, nz) + phase
+    tx = (lon + np.pi) / TWO_PI
+    ty = (lat + np.pi / 2) / np.pi
+    return tx, ty, inside
+
+
+def vortex_map(width, height, size, sides, phase):
+    """
+    drawVortexEffect seen end-on: radius picks the texture row and the angle
+    is twisted by theta * 2 plus a term growing with radius.
+    """
+    r, a, _, _ = _polar(width, height, size)
+    outer = 200.0 + np.sin(r * 0.02 + phase) * 50
+    twist = phase * 2 + r * 0.01
+    tx = (a - twist) / TWO_PI
+    ty = r / 250.0
+    return tx, ty, r < outer
+
+
+def kaleidoscope_map(width, height, size, sides, phase):
+    """
+    drawKaleidoscopeEffect's rotating segments as a mirrored angular fold.
+
+    `sides` is the number of segments (the sketch uses 8).
+    """
+    r, a, _, _ = _polar(width, height, size)
+    wedge = TWO_PI / sides
+    folded = np.mod(a + phase, wedge)
+    # Mirror every other half-wedge so the seams match up
+    folded = np.where(folded > wedge / 2, wedge - folded, folded)
+    radius = 300.0
+    tx = 0.5 + np.cos(folded) * r / (2 * radius)
+    ty = 0.5 + np.sin(folded) * r / (2 * radius)
+    return tx, ty, r < radius
+
+
+EFFECTS = {
+    "tunnel": tunnel_map,
+    "spherical": spherical_map,
+    "vortex": vortex_map,
+    "kaleidoscope": kaleidoscope_map,
+}
+
+# Effects whose geometry doesn't depend on polygon sides share tables
+USES_SIDES = {"kaleidoscope"}
+
+
+class RemapTable:
+    """
+    Nearest-neighbour gather indices for one output and source frame size.
+
+    Only the flat int32 indices are kept, not the float u/v maps they come
+    from, so a cache holds about three times as many tables.
+    """
+
+    def __init__(self, tx, ty, mask, src_height, src_width):
+        self.height, self.width = mask.shape
+        self.src_height = src_height
+        self.src_width = src_width
+        # Texture coordinates wrap like a repeating texture
+        sx = (np.mod(tx, 1.0) * src_width).astype(np.int32)
+        sy = (np.mod(ty, 1.0) * src_height).astype(np.int32)
+        np.minimum(sx, src_width - 1, out=sx)
+        np.minimum(sy, src_height - 1, out=sy)
+        flat = sy * src_width + sx
+        # Pixels outside the geometry point one past the last source pixel,
+        # where apply_table keeps a black pixel
+        flat[~mask] = src_height * src_width
+        self.indices = flat.ravel()
+
+    @property
+    def nbytes(self):
+        return self.indices.nbytes
+
+
+class RemapCache:
+    """
+    Byte-bounded cache of remap tables keyed by (effect, resolution, source
+    size, size, sides, phase step, phase steps).
+
+    A render sweeps the phase in order and comes back round once per turn, so
+    plain LRU would evict every table just before it is needed again. When
+    full, the cache evicts tables made for other settings (least recently
+    used first) and otherwise keeps what it has, so a turn that doesn't fit
+    still hits for the part that does.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.tables = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(effect, width, height, src_shape, size, sides, phase, phase_steps):
+        step = int(round(phase % TWO_PI / TWO_PI * phase_steps)) % phase_steps
+        return (
+            effect,
+            width,
+            height,
+            src_shape[0],
+            src_shape[1],
+            round(float(size), 3),
+            int(sides) if effect in USES_SIDES else 0,
+            step,
+            phase_steps,
+        )
+
+    def get(self, effect, width, height, src_shape, size, sides, phase, phase_steps):
+        key = self.key(
+            effect, width, height, src_shape, size, sides, phase, phase_steps
+        )
+        table = self.tables.get(key)
+        if table is not None:
+            self.hits += 1
+            self.tables.move_to_end(key)
+            return table
+
+        self.misses += 1
+        table = build_table(*key)
+        if self._make_room(key, table.nbytes):
+            self.tables[key] = table
+            self.bytes += table.nbytes
+        return table
+
+    def _make_room(self, key, nbytes):
+        settings = key[:-2]
+        for old_key in list(self.tables):
+            if self.bytes + nbytes <= self.max_bytes:
+                break
+            if old_key[:-2] != settings:
+                self.bytes -= self.tables.pop(old_key).nbytes
+        return self.bytes + nbytes <= self.max_bytes
+
+
+def build_table(
+    effect, width, height, src_height, src_width, size, sides, step, phase_steps
+):
+    phase = step * TWO_PI / phase_steps
+    tx, ty, mask = EFFECTS[effect](width, height, size, max(sides, 3), phase)
+    return RemapTable(tx, ty, mask, src_height, src_width)
+
+
+def apply_table(table, frame, out=None, padded=None):
+    """
+    Remap a frame with a vectorised gather.
+
+    Args:
+        table (RemapTable): Table to apply
+        frame (array): (h, w, channels) uint8 frame of the table's source size
+        out (array): Optional (table.height, table.width, channels) buffer to reuse
+        padded (array): Optional (h * w + 1, channels) scratch buffer to reuse
+
+    Returns:
+        array: The remapped frame
+    """
+    channels = frame.shape[2]
+    count = table.src_height * table.src_width
+    if out is None:
+        out = np.empty((table.height, table.width, channels), dtype=frame.dtype)
+    if padded is None:
+        padded = np.empty((count + 1, channels), dtype=frame.dtype)
+    # Copying the source next to a black pixel is much cheaper than zeroing
+    # the outside pixels after the gather
+    padded[:count] = frame.reshape(-1, channels)
+    padded[count] = 0
+    np.take(
+        padded,
+        table.indices,
+        axis=0,
+        out=out.reshape(-1, channels),
+    )
+    return out
+
+
+class RemapRenderer:
+    """
+    Headless renderer for the remap effects.
+
+    theta advances by 0.02 * rotation * speed per frame as in the sketch's
+    draw(), and the output and scratch buffers are reused between frames.
+
+    Tables are cached per phase step. By default there is one step per frame,
+    with the per-frame step rounded so a turn is a whole number of frames;
+    every frame then gets its exact phase and tables repeat each turn. A
+    smaller phase_steps trades visible jumps for fewer tables.
+    """
+
+    def __init__(
+        self,
+        effect,
+        width=RENDER_WIDTH,
+        height=RENDER_HEIGHT,
+        size=1.0,
+        sides=8,
+        rotation=0.5,
+        speed=1.0,
+        phase_steps=None,
+        cache=None,
+    ):
+        if effect not in EFFECTS:
+            raise ValueError(f"Unknown effect: {effect}")
+        self.effect = effect
+        self.width = width
+        self.height = height
+        self.size = size
+        self.sides = sides
+        theta_step = 0.02 * rotation * speed
+        if phase_steps is None:
+            phase_steps = max(1, round(TWO_PI / abs(theta_step))) if theta_step else 1
+            if theta_step:
+                theta_step = np.copysign(TWO_PI / phase_steps, theta_step)
+        self.theta_step = theta_step
+        self.phase_steps = phase_steps
+        self.theta = 0.0
+        self.cache = cache or RemapCache()
+        self.out = None
+        self.padded = None
+
+    def render(self, frame):
+        table = self.cache.get(
+            self.effect,
+            self.width,
+            self.height,
+            frame.shape[:2],
+            self.size,
+            self.sides,
+            self.theta,
+            self.phase_steps,
+        )
+        height, width, channels = frame.shape
+        if self.out is None or self.out.shape[2] != channels:
+            self.out = np.empty((self.height, self.width, channels), np.uint8)
+        if self.padded is None or self.padded.shape != (height * width + 1, channels):
+            self.padded = np.empty((height * width + 1, channels), np.uint8)
+        apply_table(table, frame, self.out, self.padded)
+        self.theta += self.theta_step
+        return self.out
+
+
+def render_video(input_file, output_file, renderer, framerate=30):
+    """Decode a video through ffmpeg, apply the effect and encode the result."""
+    probe = ffmpeg.probe(input_file)
+    video = next(s for s in probe["streams"] if s["codec_type"] == "video")
+    src_width, src_height = int(video["width"]), int(video["height"])
+    frame_bytes = src_width * src_height * 3
+
+    decoder = (
+        ffmpeg.input(input_file)
+        .output("pipe:", format="rawvideo", pix_fmt="rgb24")
+        .global_args("-loglevel", "error")
+        .run_async(pipe_stdout=True)
+    )
+    encoder = (
+        ffmpeg.input(
+            "pipe:",
+            format="rawvideo",
+            pix_fmt="rgb24",
+            s=f"{renderer.width}x{renderer.height}",
+            framerate=framerate,
+        )
+        .output(output_file, vcodec="libx264", pix_fmt="yuv420p", crf=18)
+        .overwrite_output()
+        .global_args("-loglevel", "error")
+        .run_async(pipe_stdin=True)
+    )
+
+    frames = 0
+    try:
+        while True:
+            data = decoder.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            frame = np.frombuffer(data, np.uint8).reshape(src_height, src_width, 3)
+            encoder.stdin.write(renderer.render(frame).tobytes())
+            frames += 1
+    finally:
+        decoder.stdout.close()
+        decoder.wait()
+        encoder.stdin.close()
+        encoder.wait()
+    return frames
+
+
+def benchmark(effect, width, height, turns=2, src_shape=(720, 1280)):
+    """
+    Time per-frame cost with tables rebuilt every frame vs the default cache.
+
+    The cached run is one continuous render of `turns` full turns at the
+    default speed, so the first turn fills the cache and later turns hit as
+    far as the byte budget allows.
+
+    Returns:
+        dict: Milliseconds per frame for each mode, frames rendered and the
+            cache hit rate
+    """
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (*src_shape, 3), dtype=np.uint8)
+    results = {}
+
+    renderer = RemapRenderer(effect, width, height, cache=RemapCache(max_bytes=0))
+    # Rebuilding every frame is slow, so sample fewer frames
+    uncached_frames = 30
+    start = time.perf_counter()
+    for _ in range(uncached_frames):
+        renderer.render(frame)
+    results["uncached_ms"] = (time.perf_counter() - start) / uncached_frames * 1000
+
+    cache = RemapCache()
+    renderer = RemapRenderer(effect, width, height, cache=cache)
+    steps = renderer.phase_steps
+    start = time.perf_counter()
+    for _ in range((turns - 1) * steps):
+        renderer.render(frame)
+    # The last turn shows the steady state of a long render
+    hits = cache.hits
+    last_turn = time.perf_counter()
+    for _ in range(steps):
+        renderer.render(frame)
+    end = time.perf_counter()
+    results["cached_ms"] = (end - start) / (turns * steps) * 1000
+    results["last_turn_ms"] = (end - last_turn) / steps * 1000
+    results["hit_rate"] = cache.hits / max(1, cache.hits + cache.misses)
+    results["last_turn_hit_rate"] = (cache.hits - hits) / steps
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remap-table geometry effects")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    render_parser = subparsers.add_parser("render", help="Render a video offline")
+    render_parser.add_argument("input")
+    render_parser.add_argument("output")
+    render_parser.add_argument("--effect", choices=sorted(EFFECTS), default="tunnel")
+    render_parser.add_argument("--size", type=float, default=1.0)
+    render_parser.add_argument("--sides", type=int, default=8)
+    render_parser.add_argument("--rotation", type=float, default=0.5)
+    render_parser.add_argument("--speed", type=float, default=1.0)
+    render_parser.add_argument("--fps", type=int, default=30)
+    render_parser.add_argument(
+        "--phase-steps", type=int, help="Tables per turn (default: one per frame)"
+    )
+
+    bench_parser = subparsers.add_parser("bench", help="Cached vs uncached cost")
+    bench_parser.add_argument("--turns", type=int, default=2, help="At least 2")
+    bench_parser.add_argument("--width", type=int, default=RENDER_WIDTH)
+    bench_parser.add_argument("--height", type=int, default=RENDER_HEIGHT)
+
+    args = parser.parse_args()
+
+    if args.command == "render":
+        renderer = RemapRenderer(
+            args.effect,
+            size=args.size,
+            sides=args.sides,
+            rotation=args.rotation,
+            speed=args.speed,
+            phase_steps=args.phase_steps,
+        )
+        start = time.perf_counter()
+        count = render_video(args.input, args.output, renderer, args.fps)
+        elapsed = time.perf_counter() - start
+        print(f"Rendered {count} frames in {elapsed:.2f}s ({count / elapsed:.1f} fps)")
+        print(f"Saved to: {args.output}")
+    else:
+        print(f"{args.width}x{args.height}, {args.turns} turns per effect\n")
+        print(
+            f"{'Effect':<14}{'Uncached':>12}{'Cached':>12}{'Hits':>8}"
+            f"{'Last turn':>12}{'Hits':>8}{'Speedup':>10}"
+        )
+        for effect in EFFECTS:
+            r = benchmark(effect, args.width, args.height, args.turns)
+            print(
+                f"{effect:<14}{r['uncached_ms']:>10.2f}ms{r['cached_ms']:>10.2f}ms"
+                f"{r['hit_rate']:>8.0%}{r['last_turn_ms']:>10.2f}ms"
+                f"{r['last_turn_hit_rate']:>8.0%}"
+                f"{r['uncached_ms'] / r['last_turn_ms']:>9.1f}x"
+            )
@@ -0,0 +1,330 @@
+import argparse
+import time
+import wave
+
+import numpy as np
+
+# Musical scale (Pentatonic scale in C), same as SoundMotionSynth.pde
+SCALE = np.array([261.63, 293.66, 329.63, 392.00, 440.00, 523.25])
+
+# Voice order used for every parameter array in this module
+VOICES = ("melody", "bass", "percussion", "drums")
+WAVEFORMS = ("sine", "triangle", "sine", "square")
+
+# Column names for parameter envelopes: one freq/amp pair per voice
+PARAM_COLUMNS = tuple(f"{v}_{p}" for v in VOICES for p in ("freq", "amp"))
+MOTION_COLUMNS = ("top", "bottom", "left", "right")
+
+# Sketch defaults
+MOTION_THRESHOLD = 0.3
+TRIGGER_INTERVAL = 100  # Milliseconds between percussion triggers
+LOOP_PLAYBACK_GAIN = 0.7
+
+
+class LoopTrack:
+    """Array-backed replacement for the sketch's ``ArrayList<SoundFrame>``.
+
+    Timestamps are kept sorted in one int array and the eight freq/amp values
+    in a matching (n, 8) float array, so the closest frame to a playback
+    position is found with a binary search instead of a linear scan.
+    """
+
+    def __init__(self, timestamps, params, duration=None):
+        order = np.argsort(timestamps, kind="stable")
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)[order]
+        self.params = np.asarray(params, dtype=np.float64)[order]
+        if duration is None:
+            duration = int(self.timestamps[-1]) + 1 if len(self.timestamps) else 4000
+        self.duration = duration
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def closest_index(self, positions):
+        """Return the index of the closest recorded frame for each position (ms)."""
+        positions = np.asarray(positions)
+        right = np.searchsorted(self.timestamps, positions)
+        right = np.clip(right, 0, len(self.timestamps) - 1)
+        left = np.clip(right - 1, 0, len(self.timestamps) - 1)
+        # Ties go to the earlier frame, like the strict '<' in the sketch
+        use_left = np.abs(self.timestamps[left] - positions) <= np.abs(
+            self.timestamps[right] - positions
+        )
+        return np.where(use_left, left, right)
+
+    def sample(self, times_ms):
+        """Return the (len(times_ms), 8) loop parameters at the given times."""
+        positions = np.asarray(times_ms, dtype=np.int64) % self.duration
+        params = self.params[self.closest_index(positions)].copy()
+        params[:, 1::2] *= LOOP_PLAYBACK_GAIN
+        return params
+
+
+def load_envelopes(path):
+    """
+    Load a CSV envelope file with a header row.
+
+    The file needs a ``time_ms`` column plus either the four motion columns
+    (top, bottom, left, right and optionally ``note`` in 0-1) or the eight
+    parameter columns (melody_freq, melody_amp, ..., drums_amp).
+
+    Args:
+        path (str): Path to the CSV file
+
+    Returns:
+        tuple: (times_ms, params) where params is an (n, 8) array
+    """
+    data = np.genfromtxt(path, delimiter=",", names=True)
+    names = data.dtype.names
+    if "time_ms" not in names:
+        raise ValueError(f"{path} has no time_ms column")
+    times = np.atleast_1d(data["time_ms"]).astype(np.int64)
+
+    if all(c in names for c in PARAM_COLUMNS):
+        params = np.column_stack([np.atleast_1d(data[c]) for c in PARAM_COLUMNS])
+        return times, params
+    if all(c in names for c in MOTION_COLUMNS):
+        motion = np.column_stack([np.atleast_1d(data[c]) for c in MOTION_COLUMNS])
+        notes = np.atleast_1d(data["note"]) if "note" in names else None
+        return times, motion_to_params(times, motion, notes)
+    raise ValueError(f"{path} has neither motion nor parameter columns")
+
+
+def motion_to_params(times_ms, motion, notes=None, threshold=MOTION_THRESHOLD):
+    """
+    Turn per-frame zone motion into voice parameters using the sketch's rules.
+
+    Args:
+        times_ms (array): Frame times in milliseconds
+        motion (array): (n, 4) top/bottom/left/right motion values
+        notes (array): Optional melody note position in 0-1 (mouseX in the sketch)
+        threshold (float): Motion threshold
+
+    Returns:
+        array: (n, 8) freq/amp pairs for melody, bass, percussion and drums
+    """
+    motion = np.asarray(motion, dtype=np.float64)
+    top, bottom, left, right = motion.T
+    n = len(motion)
+    params = np.zeros((n, 8))
+
+    if notes is None:
+        notes = np.zeros(n)
+    note_index = np.clip(
+        (np.asarray(notes) * len(SCALE)).astype(int), 0, len(SCALE) - 1
+    )
+
+    # Frequencies are held from the last trigger; they only start at the defaults
+    params[:, 0] = np.where(top > threshold, SCALE[note_index], np.nan)
+    params[0, 0] = params[0, 0] if top[0] > threshold else SCALE[0]
+    params[:, 0] = _hold_last(params[:, 0])
+    params[:, 1] = np.where(top > threshold, np.minimum(top, 0.5), 0.0)
+
+    params[:, 2] = SCALE[0] / 2
+    params[:, 3] = np.where(
+        bottom > threshold * 0.5, np.minimum(bottom * 0.8, 0.4), 0.0
+    )
+
+    # Percussion retriggers at most once per TRIGGER_INTERVAL, which depends on
+    # the previous trigger, so it is the one sequential pass
+    params[:, 4] = SCALE[-1]
+    last_trigger = -np.inf
+    for i in np.flatnonzero(left > threshold):
+        if times_ms[i] - last_trigger > TRIGGER_INTERVAL:
+            params[i, 5] = 0.2
+            last_trigger = times_ms[i]
+
+    params[:, 6] = SCALE[0] / 4
+    params[:, 7] = np.where(right > threshold, np.minimum(right * 0.6, 0.3), 0.0)
+    return params
+
+
+def _hold_last(values):
+    """Forward-fill NaNs with the last valid value."""
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(len(values)), 0)
+    np.maximum.accumulate(index, out=index)
+    return values[index]
+
+
+def _waveform(kind, phase):
+    """Evaluate a unit-amplitude waveform for phases in cycles."""
+    if kind == "sine":
+        return np.sin(2 * np.pi * phase)
+    frac = phase - np.floor(phase)
+    if kind == "triangle":
+        return 1.0 - 4.0 * np.abs(frac - 0.5)
+    if kind == "square":
+        return np.where(frac < 0.5, 1.0, -1.0)
+    raise ValueError(f"Unknown waveform: {kind}")
+
+
+class SynthRenderer:
+    """
+    Offline renderer for the four SoundMotionSynth voices.
+
+    Oscillator phase and smoothed amplitude carry over between blocks, so the
+    output is continuous no matter how the control envelope is sliced.
+    """
+
+    def __init__(self, sample_rate=44100, block_size=4096, smoothing_ms=5.0):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        # One-pole coefficient per sample for amplitude smoothing
+        if smoothing_ms > 0:
+            self.smoothing = np.exp(-1000.0 / (smoothing_ms * sample_rate))
+        else:
+            self.smoothing = 0.0
+        self.reset()
+
+    def reset(self):
+        self.phase = np.zeros(len(VOICES))
+        self.amp = np.zeros(len(VOICES))
+
+    def _smooth(self, target, voice, out):
+        """Apply the one-pole amplitude filter to a step-held target block.
+
+        Within a run of constant target the filter has a closed form, so we
+        only loop over the (few) control changes inside the block.
+        """
+        a = self.smoothing
+        y = self.amp[voice]
+        changes = np.flatnonzero(np.diff(target)) + 1
+        start = 0
+        for end in (*changes, len(target)):
+            t = target[start]
+            decay = a ** np.arange(1, end - start + 1)
+            out[start:end] = t + (y - t) * decay
+            y = out[end - 1]
+            start = end
+        self.amp[voice] = y
+
+    def render_block(self, params, out):
+        """
+        Render one block into ``out``.
+
+        Args:
+            params (array): (len(out), 8) step-held freq/amp per sample
+            out (array): Output buffer, overwritten with the mix
+        """
+        n = len(out)
+        out[:] = 0.0
+        amp = np.empty(n)
+        for v, kind in enumerate(WAVEFORMS):
+            freq = params[:, 2 * v]
+            # Phase in cycles: running sum of per-sample increments
+            phase = self.phase[v] + np.cumsum(freq) / self.sample_rate
+            self._smooth(params[:, 2 * v + 1], v, amp)
+            out += amp * _waveform(kind, phase - freq / self.sample_rate)
+            self.phase[v] = phase[-1] % 1.0
+        return out
+
+    def render(self, times_ms, params, duration_ms=None, loop=None):
+        """
+        Render parameter envelopes (and optionally a recorded loop) to samples.
+
+        Args:
+            times_ms (array): Control times in milliseconds, ascending
+            params (array): (n, 8) freq/amp pairs at those times
+            duration_ms (int): Length to render, defaults to the last control time
+            loop (LoopTrack): Recorded loop to mix in, like the sketch's playback
+
+        Returns:
+            array: float32 mono samples in -1..1
+        """
+        times_ms = np.asarray(times_ms, dtype=np.int64)
+        params = np.asarray(params, dtype=np.float64)
+        if duration_ms is None:
+            duration_ms = int(times_ms[-1]) if len(times_ms) else loop.duration
+        total = int(duration_ms * self.sample_rate / 1000)
+        output = np.empty(total, dtype=np.float32)
+        block = np.empty(self.block_size)
+
+        self.reset()
+        for start in range(0, total, self.block_size):
+            n = min(self.block_size, total - start)
+            sample_ms = (np.arange(start, start + n) * 1000) // self.sample_rate
+            index = np.searchsorted(times_ms, sample_ms, side="right") - 1
+            block_params = params[np.clip(index, 0, len(params) - 1)]
+            if loop is not None and len(loop):
+                block_params = _mix_loop(block_params, loop.sample(sample_ms))
+            self.render_block(block_params, block[:n])
+            np.clip(block[:n], -1.0, 1.0, out=output[start : start + n])
+        return output
+
+
+def _mix_loop(live, recorded):
+    """Silent live voices fall back to the loop, as in the sketch's playback."""
+    mixed = live.copy()
+    silent = live[:, 1::2] == 0
+    for v in range(len(VOICES)):
+        rows = silent[:, v]
+        mixed[rows, 2 * v : 2 * v + 2] = recorded[rows, 2 * v : 2 * v + 2]
+    return mixed
+
+
+def write_wav(path, samples, sample_rate=44100):
+    """Write float samples in -1..1 as a 16-bit mono WAV file."""
+    pcm = (np.asarray(samples) * 32767).astype("<i2")
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+
+
+def demo_motion(duration_ms, fps=30, seed=0):
+    """Generate a synthetic motion envelope for testing and benchmarking."""
+    rng = np.random.default_rng(seed)
+    times = np.arange(0, duration_ms, 1000 // fps, dtype=np.int64)
+    t = times / 1000.0
+    motion = np.column_stack(
+        [
+            0.3 + 0.3 * np.sin(t * 1.3),
+            0.2 + 0.2 * np.sin(t * 0.7 + 1),
+            rng.random(len(t)) * 0.6,
+            0.3 + 0.3 * np.sin(t * 2.1 + 2),
+        ]
+    )
+    notes = (np.sin(t * 0.5) + 1) / 2
+    return times, motion_to_params(times, motion, notes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Render SoundMotionSynth voices to WAV"
+    )
+    parser.add_argument("output", help="Output WAV file")
+    parser.add_argument(
+        "--envelopes", help="CSV file with motion or parameter envelopes"
+    )
+    parser.add_argument(
+        "--loop", help="CSV file with a recorded loop (parameter columns)"
+    )
+    parser.add_argument("--duration", type=float, help="Seconds to render")
+    parser.add_argument("--sample-rate", type=int, default=44100)
+    parser.add_argument("--block-size", type=int, default=4096)
+    args = parser.parse_args()
+
+    if args.envelopes:
+        times, params = load_envelopes(args.envelopes)
+    else:
+        times, params = demo_motion(int((args.duration or 60) * 1000))
+
+    loop = None
+    if args.loop:
+        loop_times, loop_params = load_envelopes(args.loop)
+        loop = LoopTrack(loop_times, loop_params)
+
+    duration_ms = int(args.duration * 1000) if args.duration else None
+    renderer = SynthRenderer(sample_rate=args.sample_rate, block_size=args.block_size)
+
+    start = time.perf_counter()
+    samples = renderer.render(times, params, duration_ms=duration_ms, loop=loop)
+    elapsed = time.perf_counter() - start
+    write_wav(args.output, samples, args.sample_rate)
+
+    seconds = len(samples) / args.sample_rate
+    print(f"Rendered {seconds:.1f}s of audio in {elapsed:.2f}s")
+    print(f"Speed: {seconds / elapsed:.1f}x realtime")
+    print(f"Saved to: {args.output}")
@@ -3,6 +3,10 @@ from tkinter import ttk, filedialog
 from pythonosc.udp_client import SimpleUDPClient
 import sys
 import os
+import queue
+from proxy_cache import ProxyCache
+from media_library import MediaLibrary
+from library_browser import LibraryBrowser
 
 
 class VideoEffectsController:
@@ -26,6 +30,16 @@ class VideoEffectsController:
         # Initialize OSC client
         self.osc = SimpleUDPClient("127.0.0.1", 12000)
 
+        # Proxy transcodes for loaded videos, built in the background
+        self.proxy_cache = ProxyCache()
+        self.pending_video = None
+        self.proxy_results = queue.Queue()
+        self.polling_proxies = False
+
+        # Media library is opened on first use
+        self.library = None
+        self.library_browser = None
+
         # Create sections in a more compact layout
         self.create_source_controls()
 
@@ -63,6 +77,9 @@ class VideoEffectsController:
         ttk.Button(source_frame, text="🎬 Load Video", command=self.on_load_video).pack(
             side=tk.LEFT, padx=5, pady=2
         )
+        ttk.Button(source_frame, text="📚 Library", command=self.on_open_library).pack(
+            side=tk.LEFT, padx=5, pady=2
+        )
 
     def create_effect_controls(self, parent):
         effect_frame = ttk.LabelFrame(
@@ -313,12 +330,64 @@ class VideoEffectsController:
             filetypes=[("Video files", "*.mp4 *.avi *.mov *.mkv")]
         )
         if file_path:
-            self.source_var.set(False)
-            self.osc.send_message("/source", 1)  # 1 for video
-            self.osc.send_message("/video_path", file_path)
+            self.load_video_file(file_path)
+
+    def on_open_library(self):
+        if self.library is None:
+            self.library = MediaLibrary()
+        if self.library_browser is None or self.library_browser.closed:
+            self.library_browser = LibraryBrowser(
+                self.main_frame, self.library, self.load_video_file
+            )
+        else:
+            self.library_browser.window.lift()
+
+    def load_video_file(self, file_path):
+        self.source_var.set(False)
+        self.pending_video = file_path
+        proxy_path = self.proxy_cache.request(
+            file_path, lambda *result: self.proxy_results.put(result)
+        )
+        if proxy_path:
+            self.send_video_path(proxy_path)
+        elif not self.polling_proxies:
+            self.polling_proxies = True
+            self.main_frame.after(100, self.poll_proxy_results)
+
+    def poll_proxy_results(self):
+        # Proxy workers queue their results so they are handled on the Tk thread
+        while True:
+            try:
+                self.on_proxy_ready(*self.proxy_results.get_nowait())
+            except queue.Empty:
+                break
+        if self.pending_video is not None:
+            self.main_frame.after(100, self.poll_proxy_results)
+        else:
+            self.polling_proxies = False
+
+    def on_proxy_ready(self, file_path, proxy_path, error):
+        if file_path != self.pending_video:
+            return  # The user picked another video in the meantime
+        if error:
+            print(f"Proxy transcode failed, using original file: {error}")
+            proxy_path = file_path
+        self.send_video_path(proxy_path)
+
+    def send_video_path(self, video_path):
+        self.pending_video = None
+        self.osc.send_message("/source", 1)  # 1 for video
+        self.osc.send_message("/video_path", video_path)
+
+    def shutdown(self):
+        """Stop background proxy transcodes and thumbnail jobs."""
+        self.proxy_cache.shutdown(wait=True)
+        if self.library is not None:
+            self.library.shutdown()
 
     def on_use_camera(self):
         self.source_var.set(True)
+        self.pending_video = None
         self.osc.send_message("/source", 0)  # 0 for camera
 
     def on_text_area_change(self, event=None):